@@ -7,6 +7,11 @@ from flask_bcrypt import Bcrypt
 from register import register_bp
 from login import login_bp
 from subjects import subjects_bp
+from export import export_bp
+from question_bank import question_bank_bp
+from bootstrap import bootstrap_bp
+from shared_cache import cache_bp
+from profiler import init_profiling
 
 # 🔁 Important: Import study_plan LAST if it uses db.execute_query
 from study_plan import study_bp 
@@ -39,6 +44,13 @@ app.register_blueprint(register_bp)
 app.register_blueprint(login_bp, url_prefix="/auth")
 app.register_blueprint(subjects_bp)
 app.register_blueprint(study_bp)
+app.register_blueprint(export_bp)
+app.register_blueprint(question_bank_bp)
+app.register_blueprint(bootstrap_bp)
+app.register_blueprint(cache_bp)
+
+# 🔬 Opt-in request profiling (no-op unless PROFILE_TOKEN / PROFILE_SAMPLE_RATE is set)
+init_profiling(app)
 
 @app.route("/")
 def home():
@@ -0,0 +1,80 @@
+# bootstrap.py
+"""
+Everything the dashboard needs for first paint in one request: the user,
+their subjects with plan ids, and quiz status for every plan. Uses a single
+(read) connection and two set-based queries instead of /auth/api/user +
+/subjects + one /api/quiz/result call per plan. Like /auth/api/user did, a
+visit also updates users.last_login (throttled per session).
+"""
+from flask import Blueprint, jsonify, session
+from db import get_read_connection
+from login import touch_last_login
+
+bootstrap_bp = Blueprint("bootstrap", __name__)
+
+
+@bootstrap_bp.route("/api/bootstrap", methods=["GET"])
+def bootstrap():
+    if "user_id" not in session:
+        return jsonify({"error": "Unauthorized", "redirectUrl": "../index.html"}), 401
+
+    user_id = session["user_id"]
+    touch_last_login(user_id)
+
+    conn = None
+    cursor = None
+    try:
+        conn = get_read_connection()
+        cursor = conn.cursor(dictionary=True)
+
+        cursor.execute(
+            """
+            SELECT
+                s.id,
+                s.subject_name,
+                s.education_level,
+                s.updated_at,
+                sp.id as plan_id
+            FROM subjects s
+            LEFT JOIN study_plans sp ON s.id = sp.subject_id
+            WHERE s.user_id = %s
+            ORDER BY s.updated_at DESC
+            """,
+            (user_id,),
+        )
+        subjects = cursor.fetchall()
+
+        plan_ids = [s["plan_id"] for s in subjects if s["plan_id"]]
+        attempts = {}
+        if plan_ids:
+            placeholders = ", ".join(["%s"] * len(plan_ids))
+            cursor.execute(
+                f"""
+                SELECT plan_id, score, total_questions
+                FROM quiz_attempts
+                WHERE user_id = %s AND plan_id IN ({placeholders})
+                """,
+                (user_id, *plan_ids),
+            )
+            attempts = {row["plan_id"]: row for row in cursor.fetchall()}
+
+        for subject in subjects:
+            attempt = attempts.get(subject["plan_id"])
+            subject["quiz"] = {
+                "attempted": bool(attempt),
+                "score": attempt["score"] if attempt else None,
+                "total": attempt["total_questions"] if attempt else None,
+            }
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+    return jsonify({
+        "user": {"id": user_id, "username": session.get("username")},
+        "username": session.get("username"),  # same shape as /subjects
+        "subjects": subjects,
+    })
@@ -0,0 +1,98 @@
+# cassette.py
+"""
+Record/replay store for Gemini responses.
+
+GEMINI_CASSETTE_MODE:
+  off     - (default) always call the live API
+  record  - call the live API and append every response to the cassette
+  replay  - serve responses from the cassette only; a missing prompt raises CassetteMiss
+
+Responses are keyed by a SHA-256 of the request payload (prompt + generation
+config) and the model URL without the API key, and stored append-only in a
+SQLite file (GEMINI_CASSETTE_PATH). Replay returns the newest recording for a
+key; set GEMINI_CASSETTE_LATENCY=1 to sleep for the originally measured latency.
+"""
+from dotenv import load_dotenv
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+load_dotenv()
+
+CASSETTE_MODE = os.getenv("GEMINI_CASSETTE_MODE", "off").lower()
+CASSETTE_PATH = os.getenv("GEMINI_CASSETTE_PATH", "cassettes/gemini.sqlite3")
+CASSETTE_LATENCY = os.getenv("GEMINI_CASSETTE_LATENCY", "0") == "1"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recordings (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    key         TEXT NOT NULL,
+    url         TEXT NOT NULL,
+    request     TEXT NOT NULL,
+    status_code INTEGER NOT NULL,
+    body        TEXT NOT NULL,
+    latency     REAL NOT NULL,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_recordings_key ON recordings (key, id);
+"""
+
+
+class CassetteMiss(Exception):
+    """Raised in replay mode when no recording exists for a request."""
+
+
+class Cassette:
+    def __init__(self, path=CASSETTE_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self):
+        # One SQLite connection per thread; WAL lets workers read while one records
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(url, payload):
+        canonical = json.dumps({"url": url, "payload": payload}, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def record(self, url, payload, status_code, body, latency):
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT INTO recordings (key, url, request, status_code, body, latency, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.make_key(url, payload), url, json.dumps(payload), status_code, body, latency, time.time()),
+            )
+
+    def lookup(self, url, payload):
+        """Return (status_code, body, latency) of the newest recording, or None."""
+        row = self._conn().execute(
+            "SELECT status_code, body, latency FROM recordings WHERE key = ? ORDER BY id DESC LIMIT 1",
+            (self.make_key(url, payload),),
+        ).fetchone()
+        return row
+
+    def replay(self, url, payload):
+        row = self.lookup(url, payload)
+        if row is None:
+            raise CassetteMiss(f"No recorded Gemini response for key {self.make_key(url, payload)[:12]}")
+        status_code, body, latency = row
+        if CASSETTE_LATENCY:
+            time.sleep(latency)
+        return status_code, body, latency
+
+
+cassette = Cassette() if CASSETTE_MODE in ("record", "replay") else None
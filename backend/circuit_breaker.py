@@ -0,0 +1,112 @@
+# circuit_breaker.py
+"""
+Circuit breaker and latency tracking for outbound dependencies (Gemini).
+
+closed     -> calls go through; FAILURE_THRESHOLD consecutive failures open the circuit
+open       -> calls fail fast with CircuitOpenError for OPEN_SECONDS
+half_open  -> up to HALF_OPEN_TRIALS probe calls; a success closes, a failure re-opens
+
+State is per worker process.
+"""
+from collections import deque
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency while its circuit is open."""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"{name} circuit is open, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=5, open_seconds=30, half_open_trials=1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.half_open_trials = half_open_trials
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trials_in_flight = 0
+        self.times_opened = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Reserve a call or raise CircuitOpenError."""
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining = self.opened_at + self.open_seconds - time.monotonic()
+                if remaining > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, remaining)
+                self.state = self.HALF_OPEN
+                self.trials_in_flight = 0
+
+            if self.state == self.HALF_OPEN:
+                if self.trials_in_flight >= self.half_open_trials:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, 1)
+                self.trials_in_flight += 1
+
+    def cancel_call(self):
+        """Give back a reservation from before_call() when the call was never made."""
+        with self._lock:
+            if self.state == self.HALF_OPEN and self.trials_in_flight > 0:
+                self.trials_in_flight -= 1
+
+    def record_success(self):
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                print(f"✅ {self.name} circuit closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            self.trials_in_flight = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                    print(f"⚠️ {self.name} circuit opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.trials_in_flight = 0
+
+    def status(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "times_opened": self.times_opened,
+                "rejected_calls": self.rejected,
+            }
+
+
+class LatencyTracker:
+    """Rolling window of recent latencies (seconds) for percentile-based hedging."""
+
+    def __init__(self, size=200):
+        self.samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, latency):
+        with self._lock:
+            self.samples.append(latency)
+
+    def percentile(self, pct, min_samples=20):
+        with self._lock:
+            if len(self.samples) < min_samples:
+                return None
+            ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
@@ -1,8 +1,12 @@
 # db.py
 import mysql.connector
 from mysql.connector import pooling
+from flask import has_request_context, session
 from dotenv import load_dotenv
+import itertools
 import os
+import threading
+import time
 
 # Load environment
 load_dotenv()
@@ -13,6 +17,16 @@ DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_NAME = os.getenv("DB_NAME")
 DB_PORT = int(os.getenv("DB_PORT", 3306))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+
+# Optional read replicas: "replica1,replica2:3307" (same user/password/database)
+DB_REPLICA_HOSTS = [h.strip() for h in os.getenv("DB_REPLICA_HOSTS", "").split(",") if h.strip()]
+DB_REPLICA_POOL_SIZE = int(os.getenv("DB_REPLICA_POOL_SIZE", DB_POOL_SIZE))
+DB_REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", 5))
+DB_REPLICA_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", 10))
+# After a user writes, their reads stay on the primary for this long
+DB_READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", 5))
 
 # Validate required vars
 required = {"DB_HOST": DB_HOST, "DB_USER": DB_USER, "DB_PASSWORD": DB_PASSWORD, "DB_NAME": DB_NAME}
@@ -30,41 +44,74 @@ DB_CONFIG = {
     "autocommit": False
 }
 
+# The C extension does its socket I/O outside Python, so gevent can't switch
+# greenlets while a query waits; the pure-Python protocol goes through the
+# monkey-patched socket module instead (see gunicorn.conf.py).
+if os.getenv("GUNICORN_WORKER_CLASS", "gthread") == "gevent":
+    DB_CONFIG["use_pure"] = True
+
 # Connection pool
-try:
-    connection_pool = pooling.MySQLConnectionPool(
-        pool_name="studyplan_pool",
-        pool_size=5,
-        pool_reset_session=True,
-        **DB_CONFIG
-    )
-    print("✅ Database connection pool created successfully")
-except mysql.connector.Error as e:
-    raise RuntimeError(f"❌ Failed to create connection pool: {e}")
+# Created lazily so each gunicorn worker opens its own sockets after fork.
+connection_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Create the pool on first use (once per process)"""
+    global connection_pool
+    if connection_pool is None:
+        with _pool_lock:
+            if connection_pool is None:
+                try:
+                    connection_pool = pooling.MySQLConnectionPool(
+                        pool_name="studyplan_pool",
+                        pool_size=DB_POOL_SIZE,
+                        pool_reset_session=True,
+                        **DB_CONFIG
+                    )
+                    print("✅ Database connection pool created successfully")
+                except mysql.connector.Error as e:
+                    raise RuntimeError(f"❌ Failed to create connection pool: {e}")
+    return connection_pool
 
 
 # ✅ MUST INCLUDE THESE FUNCTIONS
 
 def get_connection():
-    """Get a connection from the pool"""
-    try:
-        return connection_pool.get_connection()
-    except mysql.connector.Error as e:
-        print(f"❌ Failed to get connection: {e}")
-        raise
+    """
+    Get a connection from the pool.
+    With threaded/gevent workers more requests than pool slots can be in flight,
+    so wait (up to DB_POOL_TIMEOUT) for a slot instead of failing on an exhausted pool.
+    """
+    pool = get_pool()
+    deadline = time.monotonic() + DB_POOL_TIMEOUT
+    delay = 0.005
+    while True:
+        try:
+            return pool.get_connection()
+        except mysql.connector.PoolError as e:
+            if time.monotonic() >= deadline:
+                print(f"❌ Failed to get connection: {e}")
+                raise
+            time.sleep(delay)  # yields to other greenlets when monkey-patched
+            delay = min(delay * 2, 0.1)
+        except mysql.connector.Error as e:
+            print(f"❌ Failed to get connection: {e}")
+            raise
 
 
-def execute_query(query, params=None, fetchone=False, fetchall=False, commit=False):
+def execute_query(query, params=None, fetchone=False, fetchall=False, commit=False, read_only=False):
     """
     Execute a query and return results.
     Use fetchone=True for one row, fetchall=True for list, commit=True for INSERT/UPDATE/DELETE
+    read_only=True lets the query run on a read replica (see get_read_connection)
     """
     conn = None
     cursor = None
     result = None
 
     try:
-        conn = get_connection()
+        conn = get_read_connection() if read_only and not commit else get_connection()
         cursor = conn.cursor(dictionary=True)
         cursor.execute(query, params or ())
 
@@ -75,6 +122,7 @@ def execute_query(query, params=None, fetchone=False, fetchall=False, commit=Fal
 
         if commit:
             conn.commit()
+            note_write()
 
     except mysql.connector.Error as e:
         if conn:
@@ -90,4 +138,126 @@ def execute_query(query, params=None, fetchone=False, fetchall=False, commit=Fal
         if conn:
             conn.close()
 
-    return result
\ No newline at end of file
+    return result
+
+
+# -----------------------------
+# Read replicas
+# -----------------------------
+class Replica:
+    """A read replica with its own lazily created pool and a cached lag check."""
+
+    def __init__(self, index, address):
+        host, _, port = address.partition(":")
+        self.name = f"studyplan_replica_{index}"
+        self.config = {**DB_CONFIG, "host": host, "port": int(port or DB_PORT)}
+        self.pool = None
+        self.healthy = True
+        self.lag = None
+        self.checked_at = 0.0
+        self._pool_lock = threading.Lock()
+        self._check_lock = threading.Lock()  # separate: the health check itself creates the pool
+
+    def get_pool(self):
+        if self.pool is None:
+            with self._pool_lock:
+                if self.pool is None:
+                    self.pool = pooling.MySQLConnectionPool(
+                        pool_name=self.name,
+                        pool_size=DB_REPLICA_POOL_SIZE,
+                        pool_reset_session=True,
+                        **self.config
+                    )
+        return self.pool
+
+    def is_healthy(self):
+        """Re-check replication lag at most every DB_REPLICA_CHECK_INTERVAL seconds."""
+        if time.monotonic() - self.checked_at < DB_REPLICA_CHECK_INTERVAL:
+            return self.healthy
+        if not self._check_lock.acquire(blocking=False):
+            return self.healthy  # another thread is checking, use the last result
+        try:
+            self.checked_at = time.monotonic()
+            self.lag = self._replication_lag()
+            healthy = self.lag is not None and self.lag <= DB_REPLICA_MAX_LAG
+        except Exception as e:
+            print(f"⚠️ Replica {self.config['host']} health check failed: {e}")
+            healthy = False
+        finally:
+            self._check_lock.release()
+        if healthy != self.healthy:
+            print(f"{'✅' if healthy else '⚠️'} Replica {self.config['host']} {'healthy' if healthy else 'unhealthy'} (lag={self.lag})")
+        self.healthy = healthy
+        return healthy
+
+    def _replication_lag(self):
+        conn = self.get_pool().get_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            try:
+                cursor.execute("SHOW REPLICA STATUS")
+            except mysql.connector.Error:
+                cursor.execute("SHOW SLAVE STATUS")  # MySQL < 8.0.22
+            status = cursor.fetchone()
+        finally:
+            cursor.close()
+            conn.close()
+        if not status:
+            return None  # not replicating
+        lag = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+        return float(lag) if lag is not None else None
+
+    def mark_unhealthy(self):
+        self.healthy = False
+        self.checked_at = time.monotonic()
+
+
+replicas = [Replica(i, address) for i, address in enumerate(DB_REPLICA_HOSTS)]
+_replica_cycle = itertools.cycle(replicas) if replicas else None
+
+
+def note_write():
+    """Pin the current user's reads to the primary for DB_READ_YOUR_WRITES_SECONDS."""
+    if replicas and has_request_context():
+        session["db_last_write"] = time.time()
+
+
+def _pinned_to_primary():
+    if not has_request_context():
+        return False
+    last_write = session.get("db_last_write")
+    return last_write is not None and time.time() - last_write < DB_READ_YOUR_WRITES_SECONDS
+
+
+def get_read_connection():
+    """
+    Connection for read-only queries: a healthy replica when one is configured,
+    otherwise (or right after this user wrote something) the primary.
+    """
+    if not replicas or _pinned_to_primary():
+        return get_connection()
+
+    for _ in range(len(replicas)):
+        replica = next(_replica_cycle)
+        if not replica.is_healthy():
+            continue
+        try:
+            return replica.get_pool().get_connection()
+        except mysql.connector.PoolError:
+            continue  # replica pool busy, try the next one
+        except mysql.connector.Error as e:
+            print(f"⚠️ Replica {replica.config['host']} unavailable: {e}")
+            replica.mark_unhealthy()
+    return get_connection()
+
+
+def get_read_config():
+    """
+    Settings for a dedicated (non-pooled) read connection, routed like
+    get_read_connection(): a healthy replica unless the user just wrote.
+    """
+    if replicas and not _pinned_to_primary():
+        for replica in replicas:
+            if replica.is_healthy():
+                return replica.config
+    return DB_CONFIG
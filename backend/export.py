@@ -0,0 +1,189 @@
+# export.py
+"""
+Streaming export of study plans and quiz attempts.
+
+Rows are read with an unbuffered cursor in fetchmany() chunks and written
+straight into the response as NDJSON (or NDJSON files inside a streamed ZIP),
+so memory stays flat however many plans are exported.
+
+Each export opens its own connection instead of borrowing one from the request
+pool: a large download can stream for minutes and would otherwise hold one of
+the DB_POOL_SIZE connections that logins and plan generation depend on.
+"""
+from flask import Blueprint, Response, request, jsonify, session, stream_with_context
+from db import get_read_config
+from dotenv import load_dotenv
+from datetime import datetime
+import hmac
+import json
+import mysql.connector
+import os
+import zipfile
+
+load_dotenv()
+
+export_bp = Blueprint("export", __name__)
+
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 200))
+# Bulk (cohort) exports for schools: requests carrying X-Export-Token may pass ?user_ids=1,2,3
+EXPORT_TOKEN = os.getenv("EXPORT_TOKEN")
+
+PLANS_QUERY = """
+    SELECT sp.id, sp.user_id, sp.subject_id, s.subject_name, s.education_level,
+           sp.summary, sp.roadmap, sp.quiz_questions
+    FROM study_plans sp
+    JOIN subjects s ON sp.subject_id = s.id
+    WHERE sp.user_id IN ({placeholders})
+    ORDER BY sp.id
+"""
+
+ATTEMPTS_QUERY = """
+    SELECT id, user_id, plan_id, answers, score, total_questions
+    FROM quiz_attempts
+    WHERE user_id IN ({placeholders})
+    ORDER BY id
+"""
+
+JSON_COLUMNS = ("roadmap", "quiz_questions", "answers")
+
+
+# -----------------------------
+# Row streaming helpers
+# -----------------------------
+def stream_rows(conn, query, params):
+    """Yield rows one by one from an unbuffered cursor, EXPORT_CHUNK_SIZE at a time."""
+    cursor = conn.cursor(dictionary=True, buffered=False)
+    try:
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                yield row
+    finally:
+        try:
+            # Drain unread rows (e.g. client disconnected) so the next query can run
+            conn.consume_results()
+        except Exception:
+            pass
+        cursor.close()
+
+
+def to_ndjson(record_type, row):
+    record = {"type": record_type}
+    for key, value in row.items():
+        if key in JSON_COLUMNS and isinstance(value, (str, bytes, bytearray)):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                pass
+        record[key] = value
+    return json.dumps(record, default=str) + "\n"
+
+
+def export_records(user_ids):
+    """Yield NDJSON lines: every plan first, then every quiz attempt."""
+    placeholders = ", ".join(["%s"] * len(user_ids))
+    conn = mysql.connector.connect(**get_read_config())
+    try:
+        for row in stream_rows(conn, PLANS_QUERY.format(placeholders=placeholders), tuple(user_ids)):
+            yield "plan", to_ndjson("plan", row)
+        for row in stream_rows(conn, ATTEMPTS_QUERY.format(placeholders=placeholders), tuple(user_ids)):
+            yield "quiz_attempt", to_ndjson("quiz_attempt", row)
+    finally:
+        conn.close()
+
+
+# -----------------------------
+# Output formats
+# -----------------------------
+def generate_ndjson(user_ids):
+    for _, line in export_records(user_ids):
+        yield line
+
+
+class _ChunkBuffer:
+    """Write-only file object that hands written bytes back to a generator."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def generate_zip(user_ids):
+    """Stream a ZIP with plans.ndjson and quiz_attempts.ndjson (no seeking, no temp files)."""
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        member = None
+        current = None
+        for record_type, line in export_records(user_ids):
+            if record_type != current:
+                if member:
+                    member.close()
+                current = record_type
+                member = archive.open(f"{record_type}s.ndjson", mode="w", force_zip64=True)
+            member.write(line.encode("utf-8"))
+            data = buffer.drain()
+            if data:
+                yield data
+        if member:
+            member.close()
+    yield buffer.drain()
+
+
+def _requested_user_ids():
+    """The session user, or an explicit cohort when a valid export token is supplied."""
+    raw_ids = request.args.get("user_ids")
+    if not raw_ids:
+        return [session["user_id"]]
+    token = request.headers.get("X-Export-Token")
+    if not (EXPORT_TOKEN and token and hmac.compare_digest(token, EXPORT_TOKEN)):
+        return None
+    return [int(uid) for uid in raw_ids.split(",") if uid.strip()]
+
+
+# -----------------------------
+# Export route
+# -----------------------------
+@export_bp.route("/api/export", methods=["GET"])
+def export_data():
+    if "user_id" not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    try:
+        user_ids = _requested_user_ids()
+    except ValueError:
+        return jsonify({"error": "user_ids must be a comma separated list of ids"}), 400
+    if user_ids is None:
+        return jsonify({"error": "Forbidden"}), 403
+    if not user_ids:
+        return jsonify({"error": "No users selected"}), 400
+
+    export_format = request.args.get("format", "ndjson").lower()
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+
+    if export_format == "zip":
+        return Response(
+            stream_with_context(generate_zip(user_ids)),
+            mimetype="application/zip",
+            headers={"Content-Disposition": f"attachment; filename=studyaibuddy-export-{stamp}.zip"},
+        )
+    if export_format == "ndjson":
+        return Response(
+            stream_with_context(generate_ndjson(user_ids)),
+            mimetype="application/x-ndjson",
+            headers={"Content-Disposition": f"attachment; filename=studyaibuddy-export-{stamp}.ndjson"},
+        )
+    return jsonify({"error": "format must be 'ndjson' or 'zip'"}), 400
@@ -0,0 +1,214 @@
+# gemini.py
+"""
+Single entry point for calls to the Gemini generateContent API.
+
+Everything that talks to Gemini goes through generate_content() so that
+cross-cutting behaviour lives in one place:
+
+  * record/replay (see cassette.py)
+  * a circuit breaker: when Gemini keeps failing, calls fail fast with
+    CircuitOpenError (or are served from the cassette, if one is recording)
+    instead of each waiting for the full timeout
+  * optional hedging (GEMINI_HEDGE=1): if a call has not answered after the
+    recent p95 latency, a second identical call is sent and the first
+    response to arrive wins
+  * quota admission control shared across workers (see rate_limiter.py)
+"""
+from cassette import cassette, CASSETTE_MODE
+from circuit_breaker import CircuitBreaker, CircuitOpenError, LatencyTracker
+from rate_limiter import limiter, estimate_tokens
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dotenv import load_dotenv
+import os
+import threading
+import time
+import json
+import requests
+
+load_dotenv()
+
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL_URL = f"{os.getenv('GEMINI_API_URL')}:generateContent"
+GEMINI_API_URL = f"{GEMINI_MODEL_URL}?key={GEMINI_API_KEY}"
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", 20))
+
+GEMINI_HEDGE = os.getenv("GEMINI_HEDGE", "0") == "1"
+GEMINI_HEDGE_PERCENTILE = float(os.getenv("GEMINI_HEDGE_PERCENTILE", 95))
+GEMINI_HEDGE_MIN_DELAY = float(os.getenv("GEMINI_HEDGE_MIN_DELAY", 1.0))
+
+breaker = CircuitBreaker(
+    "gemini",
+    failure_threshold=int(os.getenv("GEMINI_BREAKER_FAILURES", 5)),
+    open_seconds=float(os.getenv("GEMINI_BREAKER_OPEN_SECONDS", 30)),
+    half_open_trials=int(os.getenv("GEMINI_BREAKER_HALF_OPEN_TRIALS", 1)),
+)
+latencies = LatencyTracker()
+# In-flight generations per worker (enforced in study_plan.py). Each one makes its
+# Gemini calls sequentially, so at most one primary + one hedge per generation runs
+# on the pool; sizing it at twice that means primaries never queue behind each other.
+MAX_CONCURRENT_GENERATIONS = int(os.getenv("MAX_CONCURRENT_GENERATIONS", 48))
+_hedge_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("GEMINI_HEDGE_THREADS", 2 * MAX_CONCURRENT_GENERATIONS)),
+    thread_name_prefix="gemini-hedge",
+)
+_hedge_stats = {"calls": 0, "hedges_sent": 0, "primary_wins": 0, "hedge_wins": 0, "served_from_cassette": 0}
+_stats_lock = threading.Lock()
+
+
+class GeminiResponse:
+    """Minimal response object (status_code, text, json()) shared by live and replayed calls."""
+
+    def __init__(self, status_code, text, latency, replayed=False, headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.latency = latency
+        self.replayed = replayed
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def extract_text(response):
+    """Pull the generated text out of a generateContent response."""
+    return (
+        response.json()
+        .get("candidates", [{}])[0]
+        .get("content", {})
+        .get("parts", [{}])[0]
+        .get("text", "")
+    )
+
+
+def _post(payload, timeout):
+    started = time.perf_counter()
+    response = requests.post(
+        GEMINI_API_URL, json=payload, headers={"Content-Type": "application/json"}, timeout=timeout
+    )
+    return GeminiResponse(
+        response.status_code, response.text, time.perf_counter() - started, headers=response.headers
+    )
+
+
+def _count(stat):
+    with _stats_lock:
+        _hedge_stats[stat] += 1
+
+
+def _is_failure(response):
+    # Overload and server errors count against the breaker; other 4xx are our fault
+    return response.status_code == 429 or response.status_code >= 500
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _hedged_post(payload, timeout, tokens):
+    """Send the call, and a duplicate if it is slower than the recent p95; first success wins."""
+    delay = latencies.percentile(GEMINI_HEDGE_PERCENTILE)
+    if delay is None:
+        return _post(payload, timeout)
+
+    primary = _hedge_pool.submit(_post, payload, timeout)
+    done, _ = wait([primary], timeout=max(delay, GEMINI_HEDGE_MIN_DELAY))
+    if done or not primary.running():
+        # Finished, or still queued for a pool thread: the delay says nothing about Gemini then
+        return primary.result()
+
+    # Hedges are extra load: only send one when there is spare quota
+    if not limiter.try_acquire(tokens, priority="batch"):
+        return primary.result()
+
+    _count("hedges_sent")
+    hedge = _hedge_pool.submit(_post, payload, timeout)
+    pending = {primary, hedge}
+    first_error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                response = future.result()
+            except Exception as e:
+                first_error = first_error or e
+                continue
+            if _is_failure(response) and pending:
+                continue  # give the other request a chance
+            _count("primary_wins" if future is primary else "hedge_wins")
+            return response
+    raise first_error
+
+
+def _call_live(payload, timeout, priority):
+    breaker.before_call()
+    tokens = estimate_tokens(payload)
+    try:
+        limiter.acquire(tokens, priority=priority)
+    except Exception:
+        breaker.cancel_call()
+        raise
+
+    _count("calls")
+    try:
+        response = _hedged_post(payload, timeout, tokens) if GEMINI_HEDGE else _post(payload, timeout)
+    except requests.RequestException:
+        breaker.record_failure()
+        raise
+    if response.status_code == 429:
+        limiter.throttled(_retry_after(response))
+    if _is_failure(response):
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+        latencies.add(response.latency)
+    return response
+
+
+def generate_content(payload, timeout=GEMINI_TIMEOUT, priority="interactive"):
+    """
+    POST a generateContent payload, honouring GEMINI_CASSETTE_MODE, the circuit breaker
+    and the shared quota. priority is "interactive" or "batch"; raises RateLimitExceeded
+    when no capacity frees up within that class's wait budget.
+    """
+    if CASSETTE_MODE == "replay":
+        status_code, body, latency = cassette.replay(GEMINI_MODEL_URL, payload)
+        return GeminiResponse(status_code, body, latency, replayed=True)
+
+    try:
+        response = _call_live(payload, timeout, priority)
+    except CircuitOpenError:
+        # While the circuit is open, fall back to a recorded answer for this exact prompt if we have one
+        cached = cassette.lookup(GEMINI_MODEL_URL, payload) if cassette else None
+        if cached and cached[0] == 200:
+            _count("served_from_cassette")
+            return GeminiResponse(cached[0], cached[1], cached[2], replayed=True)
+        raise
+
+    if CASSETTE_MODE == "record":
+        try:
+            cassette.record(GEMINI_MODEL_URL, payload, response.status_code, response.text, response.latency)
+        except Exception as e:
+            print(f"⚠️ Failed to record Gemini response: {e}")
+    return response
+
+
+def get_status():
+    """Breaker state, latency percentiles and hedge counters for this worker."""
+    with _stats_lock:
+        hedging = dict(_hedge_stats)
+    sent = hedging["hedges_sent"]
+    hedging["hedge_win_rate"] = round(hedging["hedge_wins"] / sent, 3) if sent else None
+    hedging["enabled"] = GEMINI_HEDGE
+    return {
+        "breaker": breaker.status(),
+        "latency": {
+            "p50": latencies.percentile(50, min_samples=1),
+            "p95": latencies.percentile(95, min_samples=1),
+        },
+        "hedging": hedging,
+        "quota": limiter.status(),
+        "cassette_mode": CASSETTE_MODE,
+    }
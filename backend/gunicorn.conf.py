@@ -0,0 +1,70 @@
+# gunicorn.conf.py
+"""
+Gunicorn settings for production (used by the Procfile: gunicorn -c gunicorn.conf.py app:app).
+
+Study plan generation spends most of its time waiting on Gemini, so plain sync
+workers (one request per process) cap concurrency at the worker count. By default
+we run threaded workers: each process serves GUNICORN_THREADS requests at once and
+a blocked Gemini call only holds a thread, not a process.
+
+Set GUNICORN_WORKER_CLASS=gevent for the cooperative mode. requests yields on I/O
+once gevent monkey-patches the stdlib; mysql-connector would default to its C
+extension, which blocks the whole worker, so db.py forces use_pure=True whenever
+the gevent worker is selected.
+
+Every value can be overridden through the environment.
+"""
+import multiprocessing
+import os
+
+# -----------------------------
+# Binding
+# -----------------------------
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+backlog = int(os.getenv("GUNICORN_BACKLOG", 2048))
+
+# -----------------------------
+# Workers
+# -----------------------------
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+
+# Small instances: a few processes is enough, threads provide the concurrency.
+workers = int(os.getenv("GUNICORN_WORKERS", min(multiprocessing.cpu_count() * 2 + 1, 4)))
+
+# gthread: requests in flight per worker. Only 5-10 of them ever hold a DB
+# connection at a time (see DB_POOL_SIZE), the rest are waiting on Gemini.
+threads = int(os.getenv("GUNICORN_THREADS", 64))
+
+# gevent: greenlets per worker. Raise MAX_CONCURRENT_GENERATIONS alongside it,
+# since that caps in-flight Gemini calls per worker (see study_plan.py).
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 500))
+
+# -----------------------------
+# Timeouts
+# -----------------------------
+# Must exceed the worst-case generate_plan path (two 20s Gemini calls + DB work).
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 90))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 60))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# -----------------------------
+# Recycling
+# -----------------------------
+# Restart workers periodically to cap slow leaks; jitter avoids restarting all at once.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 200))
+
+# Do not preload: db.py opens its pool lazily and MySQL sockets must not be
+# shared between forked workers.
+preload_app = False
+
+# -----------------------------
+# Logging
+# -----------------------------
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def post_fork(server, worker):
+    server.log.info(f"🚀 Worker {worker.pid} started ({worker_class}, {threads} threads)")
@@ -2,10 +2,15 @@ from flask import Blueprint, request, jsonify, session
 from db import get_connection
 from flask_bcrypt import Bcrypt
 from datetime import datetime
+import os
+import time
 
 login_bp = Blueprint("login", __name__)
 bcrypt = Bcrypt()  # ✅ Create instance here
 
+# /api/bootstrap records dashboard visits at most this often per session
+LAST_LOGIN_TOUCH_SECONDS = float(os.getenv("LAST_LOGIN_TOUCH_SECONDS", 60))
+
 # -----------------------------
 # Login route
 # -----------------------------
@@ -46,6 +51,31 @@ def login():
         return jsonify({"error": "Invalid email or password"}), 401
 
 
+# -----------------------------
+# Dashboard visits
+# -----------------------------
+def touch_last_login(user_id):
+    """Throttled users.last_login update for /api/bootstrap; never fails the request."""
+    now = time.time()
+    if now - session.get("last_login_touched", 0) < LAST_LOGIN_TOUCH_SECONDS:
+        return
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("UPDATE users SET last_login = %s WHERE id = %s", (datetime.now(), user_id))
+        conn.commit()
+        session["last_login_touched"] = now
+    except Exception as e:
+        print(f"⚠️ Failed to update last_login: {e}")
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+
 # -----------------------------
 # Get current user
 # -----------------------------
@@ -0,0 +1,159 @@
+# profiler.py
+"""
+Opt-in per-request profiling.
+
+A request is profiled when it carries an ``X-Profile-Token`` header matching
+PROFILE_TOKEN, or when it is picked by PROFILE_SAMPLE_RATE (0.0 - 1.0).
+Each profiled request writes two files into PROFILE_DIR:
+
+  * <name>.collapsed  - folded stacks ("frame;frame;frame count"), readable by
+                        flamegraph.pl, speedscope, inferno, etc.
+  * <name>.prof       - raw cProfile stats for pstats / snakeviz.
+
+The root frame of every folded stack is "<METHOD> <route> [<n>q]" so that
+flamegraphs from different endpoints can be merged and still told apart.
+Under gevent workers only the .prof file is written: requests run on
+greenlets, which the thread-based stack sampler can neither find nor
+interrupt.
+When neither env var is set no hooks are installed at all.
+"""
+from flask import request, g
+from dotenv import load_dotenv
+import cProfile
+import pstats
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+load_dotenv()
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", 2)) / 1000.0
+
+
+# -----------------------------
+# Stack sampler
+# -----------------------------
+class StackSampler:
+    """Samples the stack of one thread at a fixed interval from a helper thread."""
+
+    def __init__(self, thread_id, interval=PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[";".join(stack)] += 1
+
+
+def sampling_supported():
+    """False once gevent has monkey-patched threading (thread ids are greenlet ids then)."""
+    monkey = sys.modules.get("gevent.monkey")
+    return not (monkey and monkey.is_module_patched("threading"))
+
+
+def count_queries(stats):
+    """Count cursor.execute calls seen by cProfile (covers raw cursors and execute_query)."""
+    total = 0
+    for (filename, _, funcname), (_, ncalls, *_rest) in stats.stats.items():
+        if funcname in ("execute", "executemany") and "mysql" in filename and "cursor" in filename:
+            total += ncalls
+    return total
+
+
+def _should_profile():
+    token = request.headers.get("X-Profile-Token")
+    if PROFILE_TOKEN and token and hmac.compare_digest(token, PROFILE_TOKEN):
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def _start_profile():
+    if not _should_profile():
+        return
+    profile = cProfile.Profile()
+    sampler = StackSampler(threading.get_ident()) if sampling_supported() else None
+    try:
+        profile.enable()
+    except ValueError:
+        # Python 3.12+ allows one cProfile per process; fall back to sampling only
+        profile = None
+    if profile is None and sampler is None:
+        print("⚠️ Skipping profile: cProfile is busy and stack sampling is unsupported under gevent")
+        return
+    g._profile = (profile, sampler, time.perf_counter())
+    if sampler:
+        sampler.start()
+
+
+def _stop_profile(exc=None):
+    state = g.pop("_profile", None)
+    if state is None:
+        return
+    profile, sampler, started = state
+    if sampler:
+        sampler.stop()
+    if profile:
+        profile.disable()
+
+    try:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        stats = pstats.Stats(profile) if profile else None
+        queries = count_queries(stats) if stats else "na"
+        route = request.url_rule.rule if request.url_rule else request.path
+        root = f"{request.method} {route} [{queries}q]"
+
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        safe_route = route.strip("/").replace("/", "_").replace("<", "").replace(">", "").replace(":", "-") or "root"
+        name = f"{datetime.now():%Y%m%d-%H%M%S-%f}_{request.method}_{safe_route}_{queries}q_{elapsed_ms:.0f}ms"
+        base = os.path.join(PROFILE_DIR, name)
+
+        if stats:
+            stats.dump_stats(base + ".prof")
+        if sampler is None:
+            print(f"🔬 Profiled {root} in {elapsed_ms:.0f}ms -> {base}.prof (no flamegraph under gevent)")
+            return
+        with open(base + ".collapsed", "w") as f:
+            for stack, count in sampler.stacks.items():
+                f.write(f"{root};{stack} {count}\n")
+
+        print(f"🔬 Profiled {root} in {elapsed_ms:.0f}ms -> {base}.collapsed")
+    except Exception as e:
+        print(f"❌ Failed to write profile: {e}")
+
+
+def init_profiling(app):
+    """Install profiling hooks on the app if PROFILE_TOKEN or PROFILE_SAMPLE_RATE is set."""
+    if not PROFILE_TOKEN and PROFILE_SAMPLE_RATE <= 0:
+        return
+    app.before_request(_start_profile)
+    app.teardown_request(_stop_profile)
+    print(f"🔬 Request profiling enabled (sample rate {PROFILE_SAMPLE_RATE}, dir {PROFILE_DIR})")
+    if not sampling_supported():
+        print("⚠️ gevent worker: stack sampling unsupported, profiles are written as .prof only")
@@ -0,0 +1,300 @@
+# question_bank.py
+"""
+Reusable question bank built from generated quizzes.
+
+Every quiz question Gemini produces is normalized (option labels stripped,
+correct answer stored as text) and saved once per subject/level, keyed by a
+content hash. Practice and retake quizzes are then assembled by sampling the
+bank: no Gemini call and no quiz_attempts row, so the one-attempt rule for a
+plan's own quiz is unaffected.
+
+Backfill existing plans with:
+    python question_bank.py --backfill [--chunk-size 500]
+"""
+from flask import Blueprint, request, jsonify, session
+from db import execute_query, get_connection, DB_CONFIG
+from subject_index import normalize
+import mysql.connector
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+
+question_bank_bp = Blueprint("question_bank", __name__)
+
+MAX_QUIZ_QUESTIONS = 30
+LABELS = "ABCDEFGH"
+PLACEHOLDER_QUESTION = "Placeholder question"
+STOPWORDS = {
+    "the", "a", "an", "of", "and", "or", "to", "in", "on", "for", "is", "are", "which", "what",
+    "how", "why", "when", "with", "by", "from", "following", "does", "do", "its", "their", "this", "that",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS question_bank (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    content_hash CHAR(64) NOT NULL,
+    subject_key VARCHAR(255) NOT NULL,
+    level_key VARCHAR(100) NOT NULL,
+    week_topic VARCHAR(255) NULL,
+    question TEXT NOT NULL,
+    options TEXT NOT NULL,
+    answer_text TEXT NOT NULL,
+    source_plan_id INT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_question_bank_hash (content_hash),
+    KEY idx_question_bank_lookup (subject_key, level_key, week_topic)
+)
+"""
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def ensure_schema():
+    """Create the question_bank table once per process."""
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if not _schema_ready:
+            execute_query(SCHEMA, commit=True)
+            _schema_ready = True
+
+
+# -----------------------------
+# Normalization
+# -----------------------------
+def bank_keys(subject, level):
+    return normalize(subject) or "(unnamed)", (level or "General").strip().lower()
+
+
+def _tokens(text):
+    return {w for w in re.findall(r"[a-z0-9]+", str(text).lower()) if len(w) > 2 and w not in STOPWORDS}
+
+
+def match_topic(question, roadmap):
+    """Best roadmap topic for a question by word overlap with the week's topic and notes."""
+    words = _tokens(question)
+    best, best_score = None, 0
+    for week in roadmap or []:
+        if not isinstance(week, dict) or not week.get("topic"):
+            continue
+        notes = week.get("topicShortNotes") or []
+        score = len(words & _tokens(" ".join([str(week["topic"])] + [str(n) for n in notes])))
+        if score > best_score:
+            best, best_score = str(week["topic"]).strip()[:255], score
+    return best
+
+
+def normalize_question(item):
+    """Return (question, options, answer_text) or None for malformed/placeholder questions."""
+    if not isinstance(item, dict):
+        return None
+    question = str(item.get("question", "")).strip()
+    options = item.get("options") or []
+    answer = str(item.get("answer", "")).strip().upper()[:1]
+    if not question or question.startswith(PLACEHOLDER_QUESTION) or len(options) < 2:
+        return None
+
+    texts = [re.sub(r"^\s*[A-H]\s*[\)\.:]\s*", "", str(opt)).strip() for opt in options]
+    if not all(texts) or len(answer) != 1 or answer not in list(LABELS[:len(texts)]):
+        return None
+    if len({t.casefold() for t in texts}) != len(texts):
+        return None  # the answer is stored as text, so duplicate options would make it ambiguous
+    return question, texts, texts[LABELS.index(answer)]
+
+
+def content_hash(subject_key, level_key, question, options):
+    canonical = json.dumps(
+        [subject_key, level_key, " ".join(question.lower().split()), sorted(o.lower() for o in options)]
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def bank_rows(plan_id, subject, level, roadmap, quiz_questions):
+    subject_key, level_key = bank_keys(subject, level)
+    rows = []
+    for item in quiz_questions or []:
+        parsed = normalize_question(item)
+        if not parsed:
+            continue
+        question, options, answer_text = parsed
+        rows.append((
+            content_hash(subject_key, level_key, question, options),
+            subject_key, level_key, match_topic(question, roadmap),
+            question, json.dumps(options), answer_text, plan_id,
+        ))
+    return rows
+
+
+INSERT_QUERY = """
+    INSERT IGNORE INTO question_bank
+        (content_hash, subject_key, level_key, week_topic, question, options, answer_text, source_plan_id)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def add_plan_questions(plan_id, subject, level, roadmap, quiz_questions):
+    """Store a plan's questions in the bank (duplicates are ignored by content_hash)."""
+    rows = bank_rows(plan_id, subject, level, roadmap, quiz_questions)
+    if not rows:
+        return 0
+    ensure_schema()
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.executemany(INSERT_QUERY, rows)
+        conn.commit()
+        return cursor.rowcount
+    finally:
+        cursor.close()
+        conn.close()
+
+
+# -----------------------------
+# Quiz assembly
+# -----------------------------
+def assemble_quiz(subject_key, level_key, count, topic=None):
+    """Sample `count` questions from the bank and shuffle their options."""
+    ensure_schema()
+    query = "SELECT id FROM question_bank WHERE subject_key=%s AND level_key=%s"
+    params = [subject_key, level_key]
+    if topic:
+        query += " AND week_topic=%s"
+        params.append(topic)
+    ids = [row["id"] for row in execute_query(query, params=tuple(params), fetchall=True, read_only=True) or []]
+    if not ids:
+        return []
+
+    picked = random.sample(ids, min(count, len(ids)))
+    placeholders = ", ".join(["%s"] * len(picked))
+    rows = execute_query(
+        f"SELECT id, week_topic, question, options, answer_text FROM question_bank WHERE id IN ({placeholders})",
+        params=tuple(picked), fetchall=True, read_only=True,
+    )
+
+    questions = []
+    for row in rows:
+        options = json.loads(row["options"])
+        random.shuffle(options)
+        questions.append({
+            "question": row["question"],
+            "options": [f"{LABELS[i]}) {text}" for i, text in enumerate(options)],
+            "answer": LABELS[options.index(row["answer_text"])],
+            "topic": row["week_topic"],
+        })
+    random.shuffle(questions)
+    return questions
+
+
+@question_bank_bp.route("/api/quiz/assemble", methods=["POST"])
+def assemble_practice_quiz():
+    if "user_id" not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    user_id = session["user_id"]
+    data = request.get_json() or {}
+    subject = data.get("subject")
+    level = data.get("level")
+    topic = data.get("topic")
+
+    try:
+        count = max(1, min(int(data.get("count", 10)), MAX_QUIZ_QUESTIONS))
+    except (TypeError, ValueError):
+        return jsonify({"error": "count must be a number"}), 400
+
+    try:
+        if data.get("plan_id"):
+            plan = execute_query(
+                """
+                SELECT s.subject_name, s.education_level
+                FROM study_plans sp
+                JOIN subjects s ON sp.subject_id = s.id
+                WHERE sp.id=%s AND s.user_id=%s
+                """,
+                params=(data["plan_id"], user_id), fetchone=True, read_only=True,
+            )
+            if not plan:
+                return jsonify({"error": "Plan not found or access denied"}), 404
+            subject, level = plan["subject_name"], plan["education_level"]
+
+        if not subject:
+            return jsonify({"error": "plan_id or subject is required"}), 400
+
+        subject_key, level_key = bank_keys(subject, level)
+        questions = assemble_quiz(subject_key, level_key, count, topic)
+        if not questions:
+            return jsonify({"error": "No questions in the bank for this subject yet"}), 404
+
+        return jsonify({
+            "subject": subject,
+            "level": level,
+            "practice": True,
+            "quiz_questions": questions,
+        })
+    except Exception as e:
+        print(f"Error assembling quiz: {e}")
+        return jsonify({"error": "Server error", "details": str(e)}), 500
+
+
+# -----------------------------
+# Backfill from existing plans
+# -----------------------------
+def backfill(chunk_size=500):
+    """Walk study_plans by primary key and add every plan's questions to the bank."""
+    ensure_schema()
+    conn = mysql.connector.connect(**DB_CONFIG)
+    read_cursor = conn.cursor(dictionary=True)
+    write_cursor = conn.cursor()
+    last_id, plans, added = 0, 0, 0
+    try:
+        while True:
+            read_cursor.execute(
+                """
+                SELECT sp.id, sp.roadmap, sp.quiz_questions, s.subject_name, s.education_level
+                FROM study_plans sp
+                JOIN subjects s ON sp.subject_id = s.id
+                WHERE sp.id > %s
+                ORDER BY sp.id
+                LIMIT %s
+                """,
+                (last_id, chunk_size),
+            )
+            chunk = read_cursor.fetchall()
+            if not chunk:
+                break
+            rows = []
+            for plan in chunk:
+                try:
+                    roadmap = json.loads(plan["roadmap"] or "[]")
+                    quiz_questions = json.loads(plan["quiz_questions"] or "[]")
+                except ValueError:
+                    continue
+                rows.extend(bank_rows(plan["id"], plan["subject_name"], plan["education_level"], roadmap, quiz_questions))
+            if rows:
+                write_cursor.executemany(INSERT_QUERY, rows)
+                added += write_cursor.rowcount
+            conn.commit()
+            last_id = chunk[-1]["id"]
+            plans += len(chunk)
+            print(f"📦 {plans} plans scanned, {added} questions added (last id {last_id})")
+    finally:
+        read_cursor.close()
+        write_cursor.close()
+        conn.close()
+    print(f"✅ Question bank backfill done: {added} new questions from {plans} plans")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Question bank maintenance")
+    parser.add_argument("--backfill", action="store_true", help="add questions from all existing plans")
+    parser.add_argument("--chunk-size", type=int, default=500, help="plans read per query")
+    args = parser.parse_args()
+
+    if args.backfill:
+        backfill(chunk_size=args.chunk_size)
+    else:
+        parser.print_help()
@@ -0,0 +1,155 @@
+# rate_limiter.py
+"""
+Gemini admission control shared by every gunicorn worker on the host.
+
+Gemini's requests-per-minute and tokens-per-minute quotas are global, so the
+two token buckets live in a small state file guarded by an exclusive flock;
+each worker refills and debits the same buckets. Buckets are sized at
+GEMINI_QUOTA_HEADROOM of the real quota so we run just under it.
+
+Priority classes:
+  interactive  - user-facing generation; may drain the buckets completely
+  batch        - background work (and hedged duplicates); only runs while at
+                 least GEMINI_BATCH_RESERVE of each bucket stays free
+
+A caller waits up to its wait budget for capacity; past that RateLimitExceeded
+is raised with a Retry-After estimate. A 429 from Gemini empties the buckets
+and blocks every worker until the provider's retry delay has passed.
+"""
+from dotenv import load_dotenv
+import fcntl
+import json
+import math
+import os
+import time
+
+load_dotenv()
+
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", 60))
+GEMINI_TPM = float(os.getenv("GEMINI_TPM", 250000))
+GEMINI_QUOTA_HEADROOM = float(os.getenv("GEMINI_QUOTA_HEADROOM", 0.9))
+GEMINI_BATCH_RESERVE = float(os.getenv("GEMINI_BATCH_RESERVE", 0.25))
+GEMINI_RATE_STATE = os.getenv("GEMINI_RATE_STATE", "/tmp/studyaibuddy-gemini-quota.json")
+
+WAIT_BUDGETS = {
+    "interactive": float(os.getenv("GEMINI_INTERACTIVE_WAIT", 10)),
+    "batch": float(os.getenv("GEMINI_BATCH_WAIT", 120)),
+}
+DEFAULT_THROTTLE_SECONDS = 10
+
+
+class RateLimitExceeded(Exception):
+    """Raised when Gemini capacity is not available within the caller's wait budget."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Gemini quota exhausted, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class SharedTokenBucket:
+    def __init__(self, path=GEMINI_RATE_STATE, rpm=GEMINI_RPM, tpm=GEMINI_TPM, headroom=GEMINI_QUOTA_HEADROOM):
+        self.path = path
+        self.capacity = {"requests": rpm * headroom, "tokens": tpm * headroom}
+        self.rate = {k: v / 60.0 for k, v in self.capacity.items()}  # refill per second
+
+    # -----------------------------
+    # Locked state file
+    # -----------------------------
+    def _update(self, fn):
+        """Run fn(state, now) under an exclusive lock and persist the state it leaves behind."""
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            raw = os.read(fd, 4096)
+            now = time.time()
+            try:
+                state = json.loads(raw) if raw else None
+            except ValueError:
+                state = None
+            if not state:
+                state = {"requests": self.capacity["requests"], "tokens": self.capacity["tokens"],
+                         "updated": now, "blocked_until": 0}
+
+            elapsed = max(0.0, now - state["updated"])
+            for key in ("requests", "tokens"):
+                state[key] = min(self.capacity[key], state[key] + elapsed * self.rate[key])
+            state["updated"] = now
+
+            result = fn(state, now)
+
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, json.dumps(state).encode("utf-8"))
+            return result
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _try_take(self, tokens, priority):
+        """Returns 0 when admitted, otherwise seconds until enough capacity should exist."""
+        reserve = GEMINI_BATCH_RESERVE if priority == "batch" else 0.0
+        need = {"requests": 1, "tokens": min(tokens, self.capacity["tokens"])}
+
+        def take(state, now):
+            if state["blocked_until"] > now:
+                return state["blocked_until"] - now
+            wait = 0.0
+            for key, amount in need.items():
+                floor = self.capacity[key] * reserve
+                missing = amount + floor - state[key]
+                if missing > 0:
+                    wait = max(wait, missing / self.rate[key])
+            if wait == 0:
+                for key, amount in need.items():
+                    state[key] -= amount
+            return wait
+
+        return self._update(take)
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def acquire(self, tokens, priority="interactive", wait_budget=None):
+        """Block until the request is admitted, or raise RateLimitExceeded."""
+        budget = WAIT_BUDGETS.get(priority, WAIT_BUDGETS["interactive"]) if wait_budget is None else wait_budget
+        deadline = time.monotonic() + budget
+        while True:
+            wait = self._try_take(tokens, priority)
+            if wait == 0:
+                return
+            remaining = deadline - time.monotonic()
+            if wait > remaining:
+                raise RateLimitExceeded(math.ceil(wait))
+            time.sleep(min(wait, 0.5))  # re-check often, other workers may free or take capacity
+
+    def try_acquire(self, tokens, priority="batch"):
+        return self._try_take(tokens, priority) == 0
+
+    def throttled(self, retry_after=None):
+        """Gemini answered 429: empty the buckets and hold every worker back."""
+        delay = retry_after or DEFAULT_THROTTLE_SECONDS
+
+        def block(state, now):
+            state["requests"] = 0
+            state["tokens"] = 0
+            state["blocked_until"] = max(state["blocked_until"], now + delay)
+
+        self._update(block)
+
+    def status(self):
+        return self._update(lambda state, now: {
+            "requests_available": round(state["requests"], 2),
+            "tokens_available": round(state["tokens"]),
+            "blocked_for": max(0, round(state["blocked_until"] - now, 1)),
+            "capacity": self.capacity,
+        })
+
+
+def estimate_tokens(payload):
+    """Rough token cost: ~4 characters per prompt token plus the output allowance."""
+    prompt_chars = len(json.dumps(payload.get("contents", [])))
+    max_output = payload.get("generationConfig", {}).get("maxOutputTokens", 2048)
+    return prompt_chars // 4 + max_output
+
+
+limiter = SharedTokenBucket()
@@ -0,0 +1,219 @@
+# report_topics.py
+"""
+Offline report over study_plans: most generated subjects, levels and roadmap
+topics, and how many plans fell back to the placeholder content written by
+study_plan.generate_plan ("To be defined" notes / "Placeholder question").
+
+Plans are read in primary-key chunks (WHERE id > last_id ORDER BY id LIMIT n)
+on a dedicated connection, so the app's pool is never touched and only one
+chunk plus the running aggregates are in memory. Progress is checkpointed
+after every chunk; rerun with --resume to continue where it stopped.
+
+Usage:
+    python report_topics.py --out reports/ [--chunk-size 500] [--pause 0.2] [--resume]
+"""
+from db import DB_CONFIG
+import mysql.connector
+import pandas as pd
+import argparse
+import json
+import os
+import time
+
+PLACEHOLDER_NOTE = "To be defined"
+PLACEHOLDER_QUESTION = "Placeholder question"
+
+# Rows are grouped on a case/whitespace-insensitive key; the *_name column keeps
+# the first spelling seen so the report shows "Physics", not the key.
+SUBJECT_KEYS = ["subject", "level"]
+SUBJECT_COLUMNS = ["subject_name", "level_name", "plans", "roadmap_fallback", "quiz_fallback"]
+TOPIC_KEYS = ["topic"]
+TOPIC_COLUMNS = ["topic_name", "weeks"]
+
+
+# -----------------------------
+# Row parsing
+# -----------------------------
+def _load(value):
+    try:
+        return json.loads(value) if value else []
+    except (TypeError, ValueError):
+        return []
+
+
+def display_name(text):
+    """Trimmed, single-spaced text as written ("Linear  Algebra " -> "Linear Algebra")."""
+    return " ".join(str(text or "").split())
+
+
+def report_key(text):
+    return display_name(text).lower()
+
+
+def parse_plan(row):
+    """Return (subject record, [topic names]) for one study_plans row."""
+    roadmap = _load(row["roadmap"])
+    questions = _load(row["quiz_questions"])
+    weeks = [week for week in roadmap if isinstance(week, dict)]
+
+    roadmap_fallback = not weeks or any(week.get("topicShortNotes") == [PLACEHOLDER_NOTE] for week in weeks)
+    quiz_fallback = not questions or any(
+        isinstance(q, dict) and str(q.get("question", "")).startswith(PLACEHOLDER_QUESTION) for q in questions
+    )
+    subject = display_name(row["subject_name"]) or "(unnamed)"
+    level = display_name(row["education_level"]) or "General"
+    record = {
+        "subject": report_key(subject),
+        "subject_name": subject,
+        "level": report_key(level),
+        "level_name": level,
+        "plans": 1,
+        "roadmap_fallback": int(roadmap_fallback),
+        "quiz_fallback": int(quiz_fallback),
+    }
+    topics = [] if roadmap_fallback else [display_name(week.get("topic")) for week in weeks]
+    return record, [t for t in topics if t]
+
+
+def _group(df, keys):
+    """Sum the counters per key, keeping the first display name."""
+    return df.groupby(keys, sort=False).agg(
+        {column: "first" if column.endswith("_name") else "sum" for column in df.columns if column not in keys}
+    )
+
+
+def aggregate_chunk(rows):
+    """Aggregate one chunk with pandas into (subjects df, topics df)."""
+    records, topics = [], []
+    for row in rows:
+        record, plan_topics = parse_plan(row)
+        records.append(record)
+        topics.extend({"topic": report_key(t), "topic_name": t, "weeks": 1} for t in plan_topics)
+
+    subjects = _group(pd.DataFrame(records, columns=SUBJECT_KEYS + SUBJECT_COLUMNS), SUBJECT_KEYS)
+    topic_counts = _group(pd.DataFrame(topics, columns=TOPIC_KEYS + TOPIC_COLUMNS), TOPIC_KEYS)
+    return subjects, topic_counts
+
+
+def merge(total, chunk):
+    if total is None:
+        return chunk
+    # total first, so names already in the report keep their spelling
+    return _group(pd.concat([total, chunk]), total.index.names)
+
+
+# -----------------------------
+# Checkpointing
+# -----------------------------
+def save_checkpoint(path, last_id, subjects, topics):
+    state = {
+        "last_id": last_id,
+        "subjects": subjects.reset_index().to_dict("records") if subjects is not None else [],
+        "topics": topics.reset_index().to_dict("records") if topics is not None else [],
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)  # atomic, a crash never leaves a half-written checkpoint
+
+
+def load_checkpoint(path):
+    with open(path) as f:
+        state = json.load(f)
+    subjects = pd.DataFrame(state["subjects"], columns=SUBJECT_KEYS + SUBJECT_COLUMNS).set_index(SUBJECT_KEYS)
+    topics = pd.DataFrame(state["topics"], columns=TOPIC_KEYS + TOPIC_COLUMNS).set_index(TOPIC_KEYS)
+    return state["last_id"], subjects, topics
+
+
+# -----------------------------
+# Main loop
+# -----------------------------
+def run(out_dir, chunk_size=500, pause=0.0, resume=False, host=None):
+    os.makedirs(out_dir, exist_ok=True)
+    checkpoint_path = os.path.join(out_dir, "checkpoint.json")
+
+    last_id, subjects, topics = 0, None, None
+    if resume and os.path.exists(checkpoint_path):
+        last_id, subjects, topics = load_checkpoint(checkpoint_path)
+        print(f"🔁 Resuming after study_plans.id = {last_id}")
+
+    # Dedicated connection (point --host at a replica to keep load off the primary)
+    conn = mysql.connector.connect(**{**DB_CONFIG, "host": host or DB_CONFIG["host"], "autocommit": True})
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SET SESSION TRANSACTION ISOLATION LEVEL READ COMMITTED")
+
+    scanned = 0
+    try:
+        while True:
+            cursor.execute(
+                """
+                SELECT sp.id, sp.roadmap, sp.quiz_questions, s.subject_name, s.education_level
+                FROM study_plans sp
+                JOIN subjects s ON sp.subject_id = s.id
+                WHERE sp.id > %s
+                ORDER BY sp.id
+                LIMIT %s
+                """,
+                (last_id, chunk_size),
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            chunk_subjects, chunk_topics = aggregate_chunk(rows)
+            subjects = merge(subjects, chunk_subjects)
+            topics = merge(topics, chunk_topics)
+            last_id = rows[-1]["id"]
+            scanned += len(rows)
+            save_checkpoint(checkpoint_path, last_id, subjects, topics)
+            print(f"📦 {scanned} plans processed (last id {last_id})")
+
+            if pause:
+                time.sleep(pause)
+    finally:
+        cursor.close()
+        conn.close()
+
+    write_report(out_dir, subjects, topics)
+
+
+def write_report(out_dir, subjects, topics):
+    if subjects is None:
+        print("ℹ️ No study plans found")
+        return
+
+    # Group levels on their key, then show the display names instead of the keys
+    levels = _group(subjects.reset_index("subject", drop=True).drop(columns="subject_name"), "level")
+    levels = levels.set_index("level_name").rename_axis("level").sort_values("plans", ascending=False)
+    subjects = subjects.reset_index(drop=True).rename(columns={"subject_name": "subject", "level_name": "level"})
+    subjects = subjects.set_index(SUBJECT_KEYS).sort_values("plans", ascending=False)
+    topics = topics.set_index("topic_name").rename_axis("topic").sort_values("weeks", ascending=False)
+    totals = subjects.sum()
+
+    subjects.to_csv(os.path.join(out_dir, "subjects.csv"))
+    levels.to_csv(os.path.join(out_dir, "levels.csv"))
+    topics.to_csv(os.path.join(out_dir, "topics.csv"))
+
+    print("\n📊 Top subjects")
+    print(subjects.head(20).to_string())
+    print("\n📊 Levels")
+    print(levels.to_string())
+    print("\n📊 Top roadmap topics")
+    print(topics.head(20).to_string())
+    print(
+        f"\n⚠️ Fallback content: {totals['roadmap_fallback']} roadmaps and "
+        f"{totals['quiz_fallback']} quizzes out of {totals['plans']} plans"
+    )
+    print(f"✅ Report written to {out_dir}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Topic popularity and content stats over study_plans")
+    parser.add_argument("--out", default="reports", help="output directory for CSVs and the checkpoint")
+    parser.add_argument("--chunk-size", type=int, default=500, help="plans read per query")
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between chunks")
+    parser.add_argument("--resume", action="store_true", help="continue from the last checkpoint")
+    parser.add_argument("--host", help="database host to read from (e.g. a replica)")
+    args = parser.parse_args()
+
+    run(args.out, chunk_size=args.chunk_size, pause=args.pause, resume=args.resume, host=args.host)
@@ -0,0 +1,252 @@
+# shared_cache.py
+"""
+Read cache shared by all gunicorn workers on the host.
+
+Entries live in a SQLite database on /dev/shm (tmpfs, i.e. shared memory), so
+every worker sees the same entries and the same invalidations instead of each
+process warming and invalidating its own copy. Values are JSON documents
+rendered exactly as jsonify() would render them.
+
+  * size-bounded approximate LRU: at most SHARED_CACHE_MAX_ENTRIES entries and
+    SHARED_CACHE_MAX_BYTES of values; least recently read go first (read time
+    is only refreshed every SHARED_CACHE_TOUCH_INTERVAL, so hits stay read-only)
+  * tags: entries are tagged (e.g. "user:42") and writes invalidate a whole tag
+  * a fill that started before the latest invalidation of its tag is dropped,
+    so a slow reader can't put a stale row back after a write
+  * fills must come from the primary: a replica can lag past both the
+    read-your-writes window and the check above
+  * hit/miss/eviction counters for /api/cache/status
+
+Any cache error is logged and treated as a miss; MySQL stays the source of truth.
+"""
+from flask import Blueprint, jsonify, session
+from flask import json as flask_json
+from dotenv import load_dotenv
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+load_dotenv()
+
+cache_bp = Blueprint("shared_cache", __name__)
+
+_default_dir = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+SHARED_CACHE_ENABLED = os.getenv("SHARED_CACHE_ENABLED", "1") == "1"
+SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", os.path.join(_default_dir, "studyaibuddy-cache.sqlite3"))
+SHARED_CACHE_MAX_ENTRIES = int(os.getenv("SHARED_CACHE_MAX_ENTRIES", 5000))
+SHARED_CACHE_MAX_BYTES = int(os.getenv("SHARED_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+SHARED_CACHE_TTL = float(os.getenv("SHARED_CACHE_TTL", 600))
+# Hits are read-only: last_access is only refreshed when older than this, and
+# hit/miss counts are kept per process and flushed to the shared table this often.
+SHARED_CACHE_TOUCH_INTERVAL = float(os.getenv("SHARED_CACHE_TOUCH_INTERVAL", 30))
+SHARED_CACHE_STATS_FLUSH = float(os.getenv("SHARED_CACHE_STATS_FLUSH", 10))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key         TEXT PRIMARY KEY,
+    tag         TEXT,
+    value       TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    last_access REAL NOT NULL,
+    expires     REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_tag ON entries (tag);
+CREATE INDEX IF NOT EXISTS idx_entries_lru ON entries (last_access);
+CREATE TABLE IF NOT EXISTS tags (
+    tag            TEXT PRIMARY KEY,
+    invalidated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stats (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+STAT_NAMES = ("hits", "misses", "sets", "stale_fills", "evictions", "invalidations")
+
+
+class SharedCache:
+    def __init__(self, path=SHARED_CACHE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._pending = {"hits": 0, "misses": 0}  # this process, not yet flushed
+        self._pending_lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")  # tmpfs; durability is irrelevant for a cache
+            conn.executescript(SCHEMA)
+            conn.executemany("INSERT OR IGNORE INTO stats (name, value) VALUES (?, 0)", [(n,) for n in STAT_NAMES])
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _bump(conn, name, amount=1):
+        conn.execute("UPDATE stats SET value = value + ? WHERE name = ?", (amount, name))
+
+    def get(self, key):
+        """Return the cached document or None. Hits take no write lock in the common case."""
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute("SELECT value, last_access FROM entries WHERE key = ? AND expires > ?", (key, now)).fetchone()
+        if row and now - row[1] > SHARED_CACHE_TOUCH_INTERVAL:
+            try:
+                conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+            except sqlite3.OperationalError:
+                pass  # busy; LRU order is approximate anyway
+        self._count("hits" if row else "misses")
+        return flask_json.loads(row[0]) if row else None
+
+    def _count(self, name):
+        with self._pending_lock:
+            self._pending[name] += 1
+            if time.monotonic() - self._flushed_at < SHARED_CACHE_STATS_FLUSH:
+                return
+            pending = self._pending
+            self._pending = {"hits": 0, "misses": 0}
+            self._flushed_at = time.monotonic()
+        self._flush(pending)
+
+    def _flush(self, pending):
+        try:
+            conn = self._conn()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                for name, amount in pending.items():
+                    if amount:
+                        self._bump(conn, name, amount)
+        except sqlite3.OperationalError:
+            with self._pending_lock:  # try again on the next flush
+                for name, amount in pending.items():
+                    self._pending[name] += amount
+
+    def set(self, key, value, tag=None, read_started=None):
+        """
+        Store a document. read_started is when the caller began reading it from
+        MySQL; if the tag was invalidated after that, the value may be stale and is dropped.
+        """
+        now = time.time()
+        data = flask_json.dumps(value)
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if tag and read_started is not None:
+                row = conn.execute("SELECT invalidated_at FROM tags WHERE tag = ?", (tag,)).fetchone()
+                if row and row[0] >= read_started:
+                    self._bump(conn, "stale_fills")
+                    return False
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, tag, value, size, last_access, expires) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, tag, data, len(data), now, now + SHARED_CACHE_TTL),
+            )
+            self._bump(conn, "sets")
+            self._evict(conn, now)
+        return True
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM entries WHERE expires <= ?", (now,))
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        evicted = 0
+        while count > SHARED_CACHE_MAX_ENTRIES or total > SHARED_CACHE_MAX_BYTES:
+            batch = max(count - SHARED_CACHE_MAX_ENTRIES, 1 if total > SHARED_CACHE_MAX_BYTES else 0, 1)
+            rows = conn.execute("SELECT key, size FROM entries ORDER BY last_access LIMIT ?", (batch,)).fetchall()
+            if not rows:
+                break
+            conn.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k, _ in rows])
+            count -= len(rows)
+            total -= sum(size for _, size in rows)
+            evicted += len(rows)
+        if evicted:
+            self._bump(conn, "evictions", evicted)
+
+    def invalidate(self, key):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._bump(conn, "invalidations")
+
+    def invalidate_tag(self, tag):
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM entries WHERE tag = ?", (tag,))
+            conn.execute("INSERT OR REPLACE INTO tags (tag, invalidated_at) VALUES (?, ?)", (tag, now))
+            conn.execute("DELETE FROM tags WHERE invalidated_at < ?", (now - SHARED_CACHE_TTL,))
+            self._bump(conn, "invalidations")
+
+    def stats(self):
+        conn = self._conn()
+        counters = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+        with self._pending_lock:
+            for name, amount in self._pending.items():
+                counters[name] += amount  # include this worker's unflushed counts
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            **counters,
+            "hit_rate": round(counters["hits"] / lookups, 3) if lookups else None,
+            "entries": count,
+            "bytes": total,
+            "max_entries": SHARED_CACHE_MAX_ENTRIES,
+            "max_bytes": SHARED_CACHE_MAX_BYTES,
+        }
+
+
+_cache = SharedCache() if SHARED_CACHE_ENABLED else None
+
+
+# -----------------------------
+# Safe helpers used by the routes
+# -----------------------------
+def user_tag(user_id):
+    return f"user:{user_id}"
+
+
+def cache_get(key):
+    if not _cache:
+        return None
+    try:
+        return _cache.get(key)
+    except Exception as e:
+        print(f"⚠️ Shared cache get failed: {e}")
+        return None
+
+
+def cache_set(key, value, tag=None, read_started=None):
+    if not _cache:
+        return
+    try:
+        _cache.set(key, value, tag, read_started)
+    except Exception as e:
+        print(f"⚠️ Shared cache set failed: {e}")
+
+
+def cache_invalidate(key=None, tag=None):
+    if not _cache:
+        return
+    try:
+        if key:
+            _cache.invalidate(key)
+        if tag:
+            _cache.invalidate_tag(tag)
+    except Exception as e:
+        print(f"⚠️ Shared cache invalidation failed: {e}")
+
+
+@cache_bp.route("/api/cache/status", methods=["GET"])
+def cache_status():
+    if "user_id" not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+    if not _cache:
+        return jsonify({"enabled": False})
+    try:
+        return jsonify({"enabled": True, **_cache.stats()})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -1,19 +1,25 @@
 # study_bp.py
 from flask import Blueprint, request, jsonify, session
 from db import execute_query
-import os
-import requests
+from gemini import generate_content, extract_text, get_status as get_llm_status, MAX_CONCURRENT_GENERATIONS
+from circuit_breaker import CircuitOpenError
+from rate_limiter import RateLimitExceeded
+from question_bank import add_plan_questions
+from shared_cache import cache_get, cache_set, cache_invalidate, user_tag
 import json
 import re
+import threading
+import time
 
 study_bp = Blueprint("study", __name__)
 
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-GEMINI_API_URL = f"{os.getenv('GEMINI_API_URL')}:generateContent?key={GEMINI_API_KEY}"
+# Cap in-flight Gemini generations per worker below the thread count so that
+# slow LLM calls can never occupy every thread and starve /auth and /subjects.
+generation_slots = threading.BoundedSemaphore(MAX_CONCURRENT_GENERATIONS)
 
 
 def get_username(user_id):
-    result = execute_query("SELECT name FROM users WHERE id = %s", params=(user_id,), fetchone=True)
+    result = execute_query("SELECT name FROM users WHERE id = %s", params=(user_id,), fetchone=True, read_only=True)
     return result["name"] if result else None
 
 
@@ -30,6 +36,35 @@ def try_parse_json(raw_text):
         return None
 
 
+def request_plan_data(prompt, payload):
+    """
+    Ask Gemini for a plan, retrying once if fields are missing.
+    Returns (plan_data, failed_response); failed_response is set when the first call fails.
+    """
+    # First attempt
+    response = generate_content(payload)
+    if response.status_code != 200:
+        return None, response
+
+    plan_data = try_parse_json(extract_text(response))
+
+    # Retry if missing fields
+    if not plan_data or not plan_data.get("summary") or not plan_data.get("roadmap") or not plan_data.get("quiz_questions"):
+        print("⚠️ Missing fields, retrying Gemini...")
+        retry_prompt = prompt + """
+        IMPORTANT REMINDER:
+        JSON must always include "summary", "roadmap" (7 items), and "quiz_questions" (10 items).
+        """
+        retry_payload = {"contents": [{"parts": [{"text": retry_prompt}]}]}
+        retry_resp = generate_content(retry_payload)
+        if retry_resp.status_code == 200:
+            plan_data = try_parse_json(extract_text(retry_resp))
+        elif retry_resp.status_code == 429 and not plan_data:
+            return None, retry_resp  # quota hit: report it rather than saving placeholders
+
+    return plan_data, None
+
+
 # -----------------------------
 # Generate Study Plan
 # -----------------------------
@@ -111,40 +146,24 @@ def generate_plan():
                 {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_ONLY_HIGH"},
             ],
         }
-        headers = {"Content-Type": "application/json"}
-
-        # First attempt
-        response = requests.post(GEMINI_API_URL, json=payload, headers=headers, timeout=20)
-        if response.status_code != 200:
-            return jsonify({"error": "Gemini API failed", "details": response.text}), 502
-
-        raw_text = (
-            response.json()
-            .get("candidates", [{}])[0]
-            .get("content", {})
-            .get("parts", [{}])[0]
-            .get("text", "")
-        )
-        plan_data = try_parse_json(raw_text)
-
-        # Retry if missing fields
-        if not plan_data or not plan_data.get("summary") or not plan_data.get("roadmap") or not plan_data.get("quiz_questions"):
-            print("⚠️ Missing fields, retrying Gemini...")
-            retry_prompt = prompt + """
-            IMPORTANT REMINDER:
-            JSON must always include "summary", "roadmap" (7 items), and "quiz_questions" (10 items).
-            """
-            retry_payload = {"contents": [{"parts": [{"text": retry_prompt}]}]}
-            retry_resp = requests.post(GEMINI_API_URL, json=retry_payload, headers=headers, timeout=20)
-            if retry_resp.status_code == 200:
-                retry_text = (
-                    retry_resp.json()
-                    .get("candidates", [{}])[0]
-                    .get("content", {})
-                    .get("parts", [{}])[0]
-                    .get("text", "")
-                )
-                plan_data = try_parse_json(retry_text)
+        if not generation_slots.acquire(blocking=False):
+            return jsonify({"error": "Too many plans being generated, please retry shortly"}), 503, {"Retry-After": "10"}
+        try:
+            plan_data, failed_response = request_plan_data(prompt, payload)
+        except RateLimitExceeded as e:
+            return jsonify({"error": "Too many study plans are being generated, please retry shortly"}), 429, {"Retry-After": str(e.retry_after)}
+        except CircuitOpenError as e:
+            # Don't store placeholder plans while Gemini is down; let the user retry later
+            retry_after = str(max(1, int(e.retry_after)))
+            return jsonify({"error": "Study plan generation is temporarily unavailable", "details": str(e)}), 503, {"Retry-After": retry_after}
+        finally:
+            generation_slots.release()
+
+        if failed_response is not None and failed_response.status_code == 429:
+            retry_after = failed_response.headers.get("Retry-After", "10")
+            return jsonify({"error": "Too many study plans are being generated, please retry shortly"}), 429, {"Retry-After": retry_after}
+        if failed_response is not None:
+            return jsonify({"error": "Gemini API failed", "details": failed_response.text}), 502
 
         # Final fallback defaults
         summary = plan_data.get("summary", "") if plan_data else ""
@@ -170,7 +189,21 @@ def generate_plan():
             params=(subject_id, user_id, summary, json.dumps(roadmap), json.dumps(quiz_questions)),
             commit=True,
         )
-        new_plan_id = execute_query("SELECT LAST_INSERT_ID() as id", fetchone=True)["id"]
+        # LAST_INSERT_ID() is per connection and execute_query checks out a new one, so look the plan up instead
+        new_plan_id = execute_query(
+            "SELECT id FROM study_plans WHERE subject_id=%s ORDER BY id DESC LIMIT 1",
+            params=(subject_id,), fetchone=True,
+        )["id"]
+
+        # /subjects now has a plan_id for this subject; invalidate by tag so an in-flight
+        # fill that read the old list is dropped too
+        cache_invalidate(tag=user_tag(user_id))
+
+        # Feed the question bank used for practice quizzes (never fail plan generation over it)
+        try:
+            add_plan_questions(new_plan_id, subject, level, roadmap, quiz_questions)
+        except Exception as e:
+            print(f"⚠️ Failed to add questions to bank: {e}")
 
         return jsonify({
             "id": new_plan_id,
@@ -186,6 +219,16 @@ def generate_plan():
         return jsonify({"error": "Server error", "details": str(e)}), 500
 
 
+# -----------------------------
+# LLM health (breaker state, hedge win-rate)
+# -----------------------------
+@study_bp.route("/api/llm/status", methods=["GET"])
+def llm_status():
+    if "user_id" not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+    return jsonify(get_llm_status())
+
+
 # -----------------------------
 # Get Saved Plan by ID
 # -----------------------------
@@ -195,6 +238,12 @@ def get_saved_plan(plan_id):
         return jsonify({"error": "Unauthorized"}), 401
 
     user_id = session["user_id"]
+    cache_key = f"plan:{user_id}:{plan_id}"
+    cached = cache_get(cache_key)
+    if cached is not None:
+        return jsonify(cached)
+
+    read_started = time.time()
     try:
         query = """
         SELECT sp.id, sp.summary, sp.roadmap, sp.quiz_questions,
@@ -203,18 +252,21 @@ def get_saved_plan(plan_id):
         JOIN subjects s ON sp.subject_id = s.id
         WHERE sp.id=%s AND s.user_id=%s
         """
+        # Primary, not a replica: this row is about to be cached for every worker
         plan_data = execute_query(query, params=(plan_id, user_id), fetchone=True)
         if not plan_data:
             return jsonify({"error": "Plan not found or access denied"}), 404
 
-        return jsonify({
+        plan = {
             "id": plan_data["id"],
             "subject": plan_data["subject_name"],
             "level": plan_data["education_level"],
             "summary": plan_data["summary"],
             "roadmap": json.loads(plan_data["roadmap"]),
             "quiz_questions": json.loads(plan_data["quiz_questions"]),
-        })
+        }
+        cache_set(cache_key, plan, tag=user_tag(user_id), read_started=read_started)
+        return jsonify(plan)
     except Exception as e:
         print(f"Error fetching plan: {e}")
         return jsonify({"error": "Server error", "details": str(e)}), 500
@@ -232,7 +284,7 @@ def get_quiz_result(plan_id):
     try:
         result = execute_query(
             "SELECT id FROM quiz_attempts WHERE user_id=%s AND plan_id=%s",
-            params=(user_id, plan_id), fetchone=True,
+            params=(user_id, plan_id), fetchone=True, read_only=True,
         )
         return jsonify({"attempted": bool(result)})
     except Exception as e:
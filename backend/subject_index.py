@@ -0,0 +1,210 @@
+# subject_index.py
+"""
+In-process trigram index over subject names.
+
+Names are normalized ("  Mathematics " -> "mathematic", "Maths" -> "math") and
+split into character trigrams. Each user gets a small index built from their own
+rows (one indexed lookup on subjects.user_id), and a global vocabulary of
+names across all users backs typeahead suggestions. Both are rebuilt lazily:
+writes in this worker invalidate immediately, other workers pick changes up
+after INDEX_TTL seconds, which is fine for typeahead; the add-time duplicate
+check always rebuilds the user's index from the primary instead. At most INDEX_MAX_USERS per-user indexes are kept,
+least recently used first out.
+"""
+from db import execute_query
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, defaultdict
+
+INDEX_TTL = int(os.getenv("SUBJECT_INDEX_TTL", 300))
+INDEX_MAX_USERS = int(os.getenv("SUBJECT_INDEX_MAX_USERS", 1000))
+GLOBAL_VOCAB_LIMIT = int(os.getenv("SUBJECT_VOCAB_LIMIT", 5000))
+DUPLICATE_THRESHOLD = 0.6
+SEARCH_THRESHOLD = 0.3
+
+
+# -----------------------------
+# Normalization & similarity
+# -----------------------------
+def normalize(name):
+    """Lowercase, strip accents/punctuation, collapse spaces and drop plural 's'."""
+    text = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode()
+    text = re.sub(r"[^a-z0-9]+", " ", text.lower()).strip()
+    words = [w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w for w in text.split()]
+    return " ".join(words)
+
+
+def same_name(a, b):
+    """Exact duplicate: equal once case and whitespace are ignored ("C#" is not "C++")."""
+    return " ".join(a.split()).casefold() == " ".join(b.split()).casefold()
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(query, candidate, whole_name=False):
+    """
+    Trigram Jaccard similarity, boosted when one name is a prefix of the other.
+    With whole_name=True (dedupe) the boost only applies to names with the same
+    number of words, so "Physic" does not match "Physical Education".
+    """
+    if not query or not candidate:
+        return 0.0
+    if query == candidate:
+        return 1.0
+    a, b = trigrams(query), trigrams(candidate)
+    score = len(a & b) / len(a | b)
+    if whole_name and len(query.split()) != len(candidate.split()):
+        return score
+    if candidate.startswith(query) or query.startswith(candidate):
+        score = max(score, 0.5 + 0.5 * min(len(query), len(candidate)) / max(len(query), len(candidate)))
+    return score
+
+
+class TrigramIndex:
+    """Maps normalized names to entries through a trigram posting list."""
+
+    def __init__(self):
+        self.entries = {}                 # key -> (display name, normalized)
+        self.postings = defaultdict(set)  # trigram -> keys
+        self.built_at = time.monotonic()
+
+    def add(self, key, name):
+        norm = normalize(name)
+        self.entries[key] = (name, norm)
+        for gram in trigrams(norm):
+            self.postings[gram].add(key)
+
+    def search(self, query, threshold=SEARCH_THRESHOLD, limit=10, whole_name=False):
+        norm = normalize(query)
+        if not norm:
+            return []
+        candidates = set()
+        for gram in trigrams(norm):
+            candidates |= self.postings.get(gram, set())
+        scored = []
+        for key in candidates:
+            name, cand_norm = self.entries[key]
+            score = similarity(norm, cand_norm, whole_name)
+            if score >= threshold:
+                scored.append((score, key, name))
+        scored.sort(key=lambda item: (-item[0], item[2]))
+        return scored[:limit]
+
+    def expired(self):
+        return time.monotonic() - self.built_at > INDEX_TTL
+
+
+# -----------------------------
+# Per-user and global indexes
+# -----------------------------
+_user_indexes = OrderedDict()  # user_id -> TrigramIndex, least recently used first
+_global_index = None
+_lock = threading.Lock()
+
+
+def _build_user_index(user_id, read_only=True):
+    rows = execute_query(
+        "SELECT id, subject_name FROM subjects WHERE user_id = %s",
+        params=(user_id,), fetchall=True, read_only=read_only,
+    )
+    index = TrigramIndex()
+    for row in rows or []:
+        index.add(row["id"], row["subject_name"])
+    return index
+
+
+def _build_global_index():
+    rows = execute_query(
+        """
+        SELECT subject_name, COUNT(*) AS uses
+        FROM subjects
+        GROUP BY subject_name
+        ORDER BY uses DESC
+        LIMIT %s
+        """,
+        params=(GLOBAL_VOCAB_LIMIT,), fetchall=True, read_only=True,
+    )
+    index = TrigramIndex()
+    for row in rows or []:
+        norm = normalize(row["subject_name"])
+        # Keep the most used spelling for each normalized name
+        if norm and norm not in index.entries:
+            index.add(norm, row["subject_name"])
+    return index
+
+
+def get_user_index(user_id):
+    with _lock:
+        index = _user_indexes.get(user_id)
+        if index is not None:
+            _user_indexes.move_to_end(user_id)
+    if index is None or index.expired():
+        index = _remember(user_id, _build_user_index(user_id))
+    return index
+
+
+def _remember(user_id, index):
+    with _lock:
+        _user_indexes[user_id] = index
+        _user_indexes.move_to_end(user_id)
+        while len(_user_indexes) > INDEX_MAX_USERS:
+            _user_indexes.popitem(last=False)
+    return index
+
+
+def get_global_index():
+    global _global_index
+    index = _global_index
+    if index is None or index.expired():
+        index = _build_global_index()
+        with _lock:
+            _global_index = index
+    return index
+
+
+def invalidate(user_id, new_name=None):
+    """Drop a user's index after a write; new names are added to the global vocabulary."""
+    with _lock:
+        _user_indexes.pop(user_id, None)
+        if new_name and _global_index is not None:
+            norm = normalize(new_name)
+            if norm and norm not in _global_index.entries:
+                _global_index.add(norm, new_name)
+
+
+# -----------------------------
+# Queries used by the routes
+# -----------------------------
+def find_near_duplicates(user_id, name, limit=5):
+    """
+    User's existing subjects that look like the same subject as `name`. Reads the
+    user's rows from the primary: a cached index may predate a write that another
+    worker handled.
+    """
+    index = _remember(user_id, _build_user_index(user_id, read_only=False))
+    return [
+        {"id": key, "subject_name": match, "score": round(score, 2), "exact": same_name(name, match)}
+        for score, key, match in index.search(name, threshold=DUPLICATE_THRESHOLD, limit=limit, whole_name=True)
+    ]
+
+
+def search_subjects(user_id, query, limit=10):
+    """Typeahead: the user's own matching subjects plus popular names from everyone."""
+    limit = max(1, limit)
+    mine = [
+        {"id": key, "subject_name": name, "score": round(score, 2)}
+        for score, key, name in get_user_index(user_id).search(query, limit=limit)
+    ]
+    own_names = {normalize(item["subject_name"]) for item in mine}
+    suggestions = [
+        {"subject_name": name, "score": round(score, 2)}
+        for score, key, name in get_global_index().search(query, limit=limit * 2)
+        if key not in own_names
+    ][:limit]
+    return {"subjects": mine, "suggestions": suggestions}
@@ -1,15 +1,18 @@
 # subjects.py
 from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for
-from db import get_connection
+from db import get_connection, get_read_connection, note_write
+from shared_cache import cache_get, cache_set, cache_invalidate, user_tag
 from datetime import datetime
+import subject_index
+import time
 
 subjects_bp = Blueprint("subjects", __name__)
 
 
-def get_username(user_id):
+def get_username(user_id, read_only=True):
     conn = None
     try:
-        conn = get_connection()
+        conn = get_read_connection() if read_only else get_connection()
         cursor = conn.cursor(dictionary=True)
         cursor.execute("SELECT name FROM users WHERE id = %s", (user_id,))
         result = cursor.fetchone()
@@ -29,7 +32,15 @@ def get_subjects():
         return jsonify({"error": "Unauthorized"}), 401
 
     user_id = session["user_id"]
-    username = get_username(user_id)
+    cache_key = f"subjects:{user_id}"
+    cached = cache_get(cache_key)
+    if cached is not None:
+        return jsonify(cached)
+
+    # Cache fills read from the primary: a lagging replica row would pass the
+    # stale-fill check and then be served to every worker for SHARED_CACHE_TTL
+    read_started = time.time()
+    username = get_username(user_id, read_only=False)
 
     conn = None
     cursor = None
@@ -62,10 +73,12 @@ def get_subjects():
         if conn:
             conn.close()
 
-    return jsonify({
+    payload = {
         "username": username,
         "subjects": subjects  # ✅ Now includes 'plan_id' (None if no plan)
-    })
+    }
+    cache_set(cache_key, payload, tag=user_tag(user_id), read_started=read_started)
+    return jsonify(payload)
 
 
 # API to add subject
@@ -74,15 +87,29 @@ def add_subject():
     if "user_id" not in session:
         return jsonify({"error": "Unauthorized"}), 401
 
+    conn = None
+    cursor = None
     try:
         data = request.get_json()
         subject_name = data.get("name", "").strip()
         education_level = data.get("level", "General").strip()
+        force = bool(data.get("force"))
         user_id = session["user_id"]
 
         if not subject_name:
             return jsonify({"error": "Subject name required"}), 400
 
+        # Catch "Maths" vs "mathematics " before we end up generating two plans
+        similar = subject_index.find_near_duplicates(user_id, subject_name)
+        if any(match["exact"] for match in similar):
+            return jsonify({"error": "Subject already exists", "suggestions": similar}), 400
+        if similar and not force:
+            return jsonify({
+                "error": f"You already have a similar subject: {similar[0]['subject_name']}",
+                "suggestions": similar,
+                "hint": "Resend with \"force\": true to add it anyway",
+            }), 409
+
         conn = get_connection()
         cursor = conn.cursor(dictionary=True)
 
@@ -101,6 +128,9 @@ def add_subject():
             (user_id, subject_name, education_level)
         )
         conn.commit()
+        note_write()
+        cache_invalidate(tag=user_tag(user_id))
+        subject_index.invalidate(user_id, subject_name)
         return jsonify({"message": "Subject added successfully"}), 201
 
     except Exception as e:
@@ -114,6 +144,25 @@ def add_subject():
             conn.close()
 
 
+# API for subject typeahead / near-duplicate search
+@subjects_bp.route("/api/subjects/search", methods=["GET"])
+def search_subjects():
+    if "user_id" not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"subjects": [], "suggestions": []})
+
+    try:
+        limit = max(1, min(int(request.args.get("limit", 10)), 25))
+        return jsonify(subject_index.search_subjects(session["user_id"], query, limit=limit))
+    except ValueError:
+        return jsonify({"error": "limit must be a number"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 # API to delete subject
 @subjects_bp.route("/api/subjects/<int:subject_id>", methods=["DELETE"])
 def delete_subject(subject_id):
@@ -131,6 +180,9 @@ def delete_subject(subject_id):
             (subject_id, user_id),
         )
         conn.commit()
+        note_write()
+        cache_invalidate(tag=user_tag(user_id))
+        subject_index.invalidate(user_id)
         return jsonify({"message": "Subject deleted"})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -164,6 +216,9 @@ def edit_subject(subject_id):
             (new_name, datetime.now(), subject_id, user_id),
         )
         conn.commit()
+        note_write()
+        cache_invalidate(tag=user_tag(user_id))
+        subject_index.invalidate(user_id, new_name)
         return jsonify({"message": "Subject updated"})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
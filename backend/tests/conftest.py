@@ -0,0 +1,9 @@
+import os
+import sys
+
+# db.py refuses to import without these; tests never open a real connection
+for var in ("DB_HOST", "DB_USER", "DB_PASSWORD", "DB_NAME"):
+    os.environ.setdefault(var, "test")
+os.environ.setdefault("DB_REPLICA_HOSTS", "replica1")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
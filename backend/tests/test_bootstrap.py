@@ -0,0 +1,51 @@
+from flask import Flask
+
+import bootstrap
+import login
+
+
+class FakeCursor:
+    def __init__(self, log):
+        self.log = log
+
+    def execute(self, query, params=()):
+        self.log.append(" ".join(query.split())[:25])
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, log):
+        self.log = log
+
+    def cursor(self, dictionary=False):
+        return FakeCursor(self.log)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_dashboard_visits_update_last_login_throttled(monkeypatch):
+    log = []
+    monkeypatch.setattr(login, "get_connection", lambda: FakeConnection(log))
+    monkeypatch.setattr(bootstrap, "get_read_connection", lambda: FakeConnection(log))
+
+    app = Flask(__name__)
+    app.secret_key = "k"
+    app.register_blueprint(bootstrap.bootstrap_bp)
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["user_id"], sess["username"] = 7, "ada"
+
+    assert client.get("/api/bootstrap").status_code == 200
+    assert client.get("/api/bootstrap").status_code == 200
+
+    updates = [q for q in log if q.startswith("UPDATE users")]
+    assert len(updates) == 1
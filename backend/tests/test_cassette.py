@@ -0,0 +1,26 @@
+import sqlite3
+
+import cassette
+import gemini
+
+
+def test_record_then_replay_newest_without_api_key(monkeypatch, tmp_path):
+    path = tmp_path / "gemini.sqlite3"
+    monkeypatch.setattr(gemini, "cassette", cassette.Cassette(str(path)))
+    monkeypatch.setattr(gemini, "GEMINI_API_URL", f"{gemini.GEMINI_MODEL_URL}?key=secret-key")
+    payload = {"contents": [{"parts": [{"text": "Plan for Physics"}]}]}
+
+    monkeypatch.setattr(gemini, "CASSETTE_MODE", "record")
+    for body in ('{"n": 1}', '{"n": 2}'):
+        monkeypatch.setattr(gemini, "_call_live", lambda p, t, pr, body=body: gemini.GeminiResponse(200, body, 0.5))
+        gemini.generate_content(payload)
+
+    monkeypatch.setattr(gemini, "CASSETTE_MODE", "replay")
+    monkeypatch.setattr(gemini, "_call_live", None)  # replay must not go live
+    replayed = gemini.generate_content(payload)
+
+    assert replayed.replayed and replayed.json() == {"n": 2}
+    dump = "\n".join(sqlite3.connect(path).iterdump())
+    assert "secret-key" not in dump
+    # a different key in the live URL maps to the same recording
+    assert cassette.Cassette.make_key(gemini.GEMINI_MODEL_URL, payload) in dump
@@ -0,0 +1,56 @@
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_breaker_opens_after_threshold_and_fails_fast(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, open_seconds=30)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.before_call()
+    assert excinfo.value.retry_after == pytest.approx(30)
+    assert breaker.status()["rejected_calls"] == 1
+
+
+def test_half_open_allows_one_trial_then_closes_or_reopens(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, open_seconds=30)
+    breaker.before_call()
+    breaker.record_failure()
+
+    clock[0] += 31
+    breaker.before_call()  # the trial
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock[0] += 31
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.status()["times_opened"] == 2
+
+
+def test_cancel_call_gives_back_the_half_open_trial(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, open_seconds=30)
+    breaker.before_call()
+    breaker.record_failure()
+    clock[0] += 31
+
+    breaker.before_call()
+    breaker.cancel_call()  # e.g. the rate limiter refused the call
+    breaker.before_call()  # the trial is available again
+    assert breaker.trials_in_flight == 1
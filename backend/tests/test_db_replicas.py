@@ -0,0 +1,46 @@
+import threading
+
+import db
+
+
+class FakeCursor:
+    def execute(self, query):
+        pass
+
+    def fetchone(self):
+        return {"Seconds_Behind_Source": 1}
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def cursor(self, dictionary=False):
+        return FakeCursor()
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    def __init__(self, **kwargs):
+        pass
+
+    def get_connection(self):
+        return FakeConnection()
+
+
+def test_health_check_on_fresh_replica_does_not_deadlock(monkeypatch):
+    monkeypatch.setattr(db.pooling, "MySQLConnectionPool", FakePool)
+    replica = db.Replica(0, "replica1:3307")
+    assert replica.pool is None
+
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault("healthy", replica.is_healthy()), daemon=True)
+    thread.start()
+    thread.join(timeout=3)
+
+    assert not thread.is_alive(), "is_healthy() hung creating the replica pool"
+    assert result["healthy"] is True
+    assert replica.lag == 1
+    assert replica.config["port"] == 3307
@@ -0,0 +1,61 @@
+import threading
+
+import pytest
+
+import gemini
+
+
+@pytest.fixture
+def hedging(monkeypatch):
+    monkeypatch.setattr(gemini.latencies, "percentile", lambda pct, min_samples=20: 0.05)
+    monkeypatch.setattr(gemini, "GEMINI_HEDGE_MIN_DELAY", 0.05)
+    monkeypatch.setattr(gemini.limiter, "try_acquire", lambda tokens, priority="batch": True)
+
+
+def scripted_post(monkeypatch, *responses):
+    """Each call to _post gets the next (delay_event, response) pair."""
+    calls = iter(responses)
+    lock = threading.Lock()
+
+    def fake_post(payload, timeout):
+        with lock:
+            release, response = next(calls)
+        release.wait(5)
+        return response
+
+    monkeypatch.setattr(gemini, "_post", fake_post)
+
+
+def response(status_code):
+    return gemini.GeminiResponse(status_code, "{}", 0.01)
+
+
+def test_slow_primary_loses_to_hedge(monkeypatch, hedging):
+    primary_release, hedge_release = threading.Event(), threading.Event()
+    hedge_release.set()
+    scripted_post(monkeypatch, (primary_release, response(200)), (hedge_release, response(201)))
+
+    result = gemini._hedged_post({}, 5, 100)
+    primary_release.set()
+
+    assert result.status_code == 201
+
+
+def test_failed_hedge_falls_through_to_primary(monkeypatch, hedging):
+    primary_release, hedge_release = threading.Event(), threading.Event()
+    hedge_release.set()
+    scripted_post(monkeypatch, (primary_release, response(200)), (hedge_release, response(503)))
+    threading.Timer(0.2, primary_release.set).start()
+
+    result = gemini._hedged_post({}, 5, 100)
+
+    assert result.status_code == 200
+
+
+def test_no_hedge_without_spare_quota(monkeypatch, hedging):
+    monkeypatch.setattr(gemini.limiter, "try_acquire", lambda tokens, priority="batch": False)
+    primary_release = threading.Event()
+    scripted_post(monkeypatch, (primary_release, response(200)))
+    threading.Timer(0.2, primary_release.set).start()
+
+    assert gemini._hedged_post({}, 5, 100).status_code == 200
@@ -0,0 +1,23 @@
+import sys
+import types
+
+from flask import Flask
+
+import profiler
+
+
+def test_gevent_writes_prof_without_empty_flamegraph(monkeypatch, tmp_path):
+    monkey = types.SimpleNamespace(is_module_patched=lambda name: name == "threading")
+    monkeypatch.setitem(sys.modules, "gevent.monkey", monkey)
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiler, "PROFILE_TOKEN", "secret")
+
+    app = Flask(__name__)
+    app.add_url_rule("/ping", "ping", lambda: "pong")
+    profiler.init_profiling(app)
+    response = app.test_client().get("/ping", headers={"X-Profile-Token": "secret"})
+
+    assert response.status_code == 200
+    written = [p.suffix for p in tmp_path.iterdir()]
+    assert written == [".prof"]
+    assert profiler.sampling_supported() is False
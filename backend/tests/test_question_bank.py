@@ -0,0 +1,21 @@
+import question_bank
+
+
+def test_question_without_answer_is_rejected():
+    assert question_bank.normalize_question({"question": "What is 2+2?", "options": ["A) 3", "B) 4"]}) is None
+    assert question_bank.normalize_question(
+        {"question": "What is 2+2?", "options": ["A) 3", "B) 4"], "answer": ""}
+    ) is None
+
+
+def test_question_answer_maps_to_option_text():
+    parsed = question_bank.normalize_question(
+        {"question": "What is 2+2?", "options": ["A) 3", "B) 4"], "answer": "B"}
+    )
+    assert parsed == ("What is 2+2?", ["3", "4"], "4")
+
+
+def test_question_with_duplicate_options_is_rejected():
+    assert question_bank.normalize_question(
+        {"question": "What is 2+2?", "options": ["A) 4", "B) 3", "C) 4"], "answer": "C"}
+    ) is None
@@ -0,0 +1,59 @@
+import pytest
+
+import rate_limiter
+from rate_limiter import RateLimitExceeded, SharedTokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    monkeypatch.setattr(rate_limiter.time, "time", lambda: now[0])
+    monkeypatch.setattr(rate_limiter.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(rate_limiter.time, "sleep", sleep)
+    return now
+
+
+@pytest.fixture
+def bucket(tmp_path):
+    # 60 requests / 6000 tokens per minute at full headroom: 1 request and 100 tokens per second
+    return SharedTokenBucket(path=str(tmp_path / "quota.json"), rpm=60, tpm=6000, headroom=1.0)
+
+
+def test_buckets_refill_over_time(bucket, clock):
+    assert bucket.try_acquire(6000, priority="interactive")
+    assert not bucket.try_acquire(100, priority="interactive")
+
+    clock[0] += 1
+    assert bucket.try_acquire(100, priority="interactive")
+
+
+def test_batch_keeps_the_reserve_free(bucket, clock, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "GEMINI_BATCH_RESERVE", 0.25)
+    assert bucket.try_acquire(4500, priority="batch")  # leaves exactly the 25% floor
+    assert not bucket.try_acquire(1, priority="batch")
+    assert bucket.try_acquire(1500, priority="interactive")  # interactive may drain it
+
+
+def test_throttled_blocks_until_retry_after(bucket, clock):
+    bucket.throttled(retry_after=30)
+    assert bucket.status()["blocked_for"] == 30
+
+    clock[0] += 29
+    assert not bucket.try_acquire(1, priority="interactive")
+    clock[0] += 2
+    assert bucket.try_acquire(1, priority="interactive")
+
+
+def test_acquire_raises_with_retry_after(bucket, clock):
+    assert bucket.try_acquire(6000, priority="interactive")
+
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        bucket.acquire(2000, priority="interactive", wait_budget=5)
+    assert excinfo.value.retry_after == 20  # 2000 tokens at 100 tokens/s
+
+    bucket.acquire(300, priority="interactive", wait_budget=5)  # waits 3s, then admitted
+    assert clock[0] == pytest.approx(1003)
@@ -0,0 +1,41 @@
+import json
+
+import report_topics
+
+
+def plan_row(plan_id, subject, topics, level="High School"):
+    return {
+        "id": plan_id,
+        "subject_name": subject,
+        "education_level": level,
+        "roadmap": json.dumps([{"topic": t, "topicShortNotes": ["Read chapter 1"]} for t in topics]),
+        "quiz_questions": json.dumps([{"question": "What is 2 + 2?"}]),
+    }
+
+
+def test_report_groups_case_insensitively_and_keeps_display_names():
+    first = report_topics.aggregate_chunk([
+        plan_row(1, "Physics", ["Kinematics"]),
+        plan_row(2, "  physics ", ["kinematics", "Statistics"], level="high  school"),
+    ])
+    second = report_topics.aggregate_chunk([plan_row(3, "Mathematics", ["Vectors"])])
+    subjects = report_topics.merge(first[0], second[0])
+    topics = report_topics.merge(first[1], second[1])
+
+    assert subjects.loc[("physics", "high school"), "subject_name"] == "Physics"
+    assert subjects.loc[("physics", "high school"), "plans"] == 2
+    assert subjects.loc[("physics", "high school"), "level_name"] == "High School"
+    assert subjects.loc[("mathematics", "high school"), "subject_name"] == "Mathematics"
+    assert topics.loc["kinematics", "weeks"] == 2
+    assert topics.loc["statistics", "topic_name"] == "Statistics"
+
+
+def test_report_files_show_display_names(tmp_path):
+    subjects, topics = report_topics.aggregate_chunk([
+        plan_row(1, "Physics", ["Kinematics"]),
+        plan_row(2, "Chemistry", ["Bonds"], level="high school"),
+    ])
+    report_topics.write_report(str(tmp_path), subjects, topics)
+
+    assert (tmp_path / "levels.csv").read_text().splitlines()[1] == "High School,2,0,0"
+    assert "Physics,High School,1,0,0" in (tmp_path / "subjects.csv").read_text()
@@ -0,0 +1,55 @@
+import subject_index
+
+
+def test_user_indexes_are_bounded(monkeypatch):
+    monkeypatch.setattr(subject_index, "INDEX_MAX_USERS", 2)
+    monkeypatch.setattr(subject_index, "_user_indexes", subject_index.OrderedDict())
+    monkeypatch.setattr(subject_index, "_build_user_index", lambda user_id: subject_index.TrigramIndex())
+
+    for user_id in (1, 2, 1, 3):
+        subject_index.get_user_index(user_id)
+
+    assert list(subject_index._user_indexes) == [1, 3]
+
+
+def test_search_clamps_non_positive_limit(monkeypatch):
+    index = subject_index.TrigramIndex()
+    index.add(1, "Physics")
+    monkeypatch.setattr(subject_index, "get_user_index", lambda user_id: index)
+    monkeypatch.setattr(subject_index, "get_global_index", lambda: subject_index.TrigramIndex())
+
+    result = subject_index.search_subjects(42, "physics", limit=-5)
+
+    assert [item["subject_name"] for item in result["subjects"]] == ["Physics"]
+
+
+
+
+def test_near_duplicates_read_fresh_rows_from_primary(monkeypatch):
+    calls = []
+
+    def fake_query(query, params=None, fetchall=False, read_only=False):
+        calls.append(read_only)
+        return [{"id": 1, "subject_name": "Maths"}]
+
+    monkeypatch.setattr(subject_index, "execute_query", fake_query)
+    monkeypatch.setattr(subject_index, "_user_indexes", subject_index.OrderedDict())
+    subject_index._user_indexes[7] = subject_index.TrigramIndex()  # cached before another worker's write
+
+    matches = subject_index.find_near_duplicates(7, "Mathematics")
+
+    assert calls == [False]
+    assert [m["subject_name"] for m in matches] == ["Maths"]
+    assert subject_index._user_indexes[7].entries == {1: ("Maths", "math")}
+
+
+def test_only_identical_names_are_exact_duplicates(monkeypatch):
+    rows = [{"id": 1, "subject_name": "C++"}, {"id": 2, "subject_name": "Maths"}]
+    monkeypatch.setattr(subject_index, "execute_query", lambda *args, **kwargs: rows)
+    monkeypatch.setattr(subject_index, "_user_indexes", subject_index.OrderedDict())
+
+    by_name = {m["subject_name"]: m for m in subject_index.find_near_duplicates(7, "C#")}
+    assert by_name["C++"]["exact"] is False  # same trigrams, but not the same name
+
+    by_name = {m["subject_name"]: m for m in subject_index.find_near_duplicates(7, " maths ")}
+    assert by_name["Maths"]["exact"] is True
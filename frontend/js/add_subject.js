@@ -1,4 +1,3 @@
-import { checkAuth } from "./check_auth.js";
 import { logout } from "./logout.js";
 
 const addForm = document.getElementById("subjectForm");
@@ -18,12 +17,8 @@ far_bars.addEventListener("click",()=>{
 
     nav.classList.toggle("display_nav")
 })
-// 🔐 Check auth first
-checkAuth().then(() => {
-    loadSubjects();
-}).catch(() => {
-    window.location.href = "../index.html";
-});
+// 🔐 /api/bootstrap checks auth and returns subjects in one round trip (401 redirects)
+loadSubjects();
 
 addForm.addEventListener("submit", async (e) => {
     e.preventDefault();
@@ -37,15 +32,18 @@ addForm.addEventListener("submit", async (e) => {
     }
 
     try {
-        const res = await fetch("https://studyaibudy.onrender.com/api/subjects", {
-            method: "POST",
-            headers: { "Content-Type": "application/json" },
-            credentials: "include",
-            body: JSON.stringify({ name, level })
-        });
+        let res = await postSubject({ name, level });
+        let data = await res.json();
 
-        // ✅ Correct: await inside async function
-        const data = await res.json(); // ← This is line 141?
+        // ⚠️ Similar subject exists: let the user confirm before creating a duplicate
+        if (res.status === 409 && data.suggestions) {
+            if (!confirm(`${data.error}. Add "${name}" anyway?`)) {
+                showMessage("Subject not added.", "gray");
+                return;
+            }
+            res = await postSubject({ name, level, force: true });
+            data = await res.json();
+        }
 
         if (res.ok) {
             showMessage(data.message || "Subject added!", "green");
@@ -62,6 +60,15 @@ addForm.addEventListener("submit", async (e) => {
     }
 });
 
+function postSubject(body) {
+    return fetch("https://studyaibudy.onrender.com/api/subjects", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        credentials: "include",
+        body: JSON.stringify(body)
+    });
+}
+
 // ✅ Show message with auto-hide
 function showMessage(text, color) {
     messageArea.textContent = text;
@@ -82,7 +89,7 @@ function showMessage(text, color) {
 // ✅ Load subjects
 async function loadSubjects() {
     try {
-        const res = await fetch("https://studyaibudy.onrender.com/subjects", {
+        const res = await fetch("https://studyaibudy.onrender.com/api/bootstrap", {
             method: "GET",
             credentials: "include"
         });